@@ -1,4 +1,8 @@
 import os
+import time
+
+# Import time counts towards the startup report
+boot_started = time.perf_counter()
 
 # Set environment variables
 os.environ['BACKEND_URL'] = 'http://localhost:8080'
@@ -6,25 +10,66 @@ os.environ['JWT_TOKEN'] = 'eyJhbGciOiJIUzM4NCJ9.eyJzdWIiOiJkcml2ZXIiLCJpYXQiOjE3
 
 from flask import Flask
 
-from tracking.interfaces.services import tracking_api
-from iam.interfaces.services import iam_api
+from tracking.interfaces.services import tracking_api, tracking_service
+from iam.interfaces.services import iam_api, auth_service
+from shared.interfaces.services import metrics_api
 from shared.infrastructure.database import init_db
+from shared.infrastructure.metrics import registry
+
+# Seconds spent in each startup phase, reported on /metrics and logged once the app is ready
+startup_seconds = {"imports": time.perf_counter() - boot_started}
+registry.register_callback(
+    "edge_startup_seconds", "Duration of each startup phase; total runs from import to ready",
+    lambda: [((phase,), seconds) for phase, seconds in startup_seconds.items()],
+    ("phase",)
+)
+
+
+def run_workers() -> None:
+    """
+    Start the outbox forwarder and the storage maintenance (when enabled) on their background
+    threads. Only serving entry points call this, never an import of the app, so CLI commands
+    do not deliver the outbox or run maintenance next to the server. flask run does not start
+    them either; serve with python app.py or a WSGI module that calls this.
+    """
+    tracking_service.start_forwarder()
+    tracking_service.start_maintenance()
+
+
+def create_app(start_workers: bool = False) -> Flask:
+    """
+    Build the Flask app and prepare everything the first ping needs: the schema, the device
+    credential cache and the latest positions. With start_workers, the background workers are
+    started too (see run_workers()).
+    """
+    started = time.perf_counter()
+    app = Flask(__name__)
+    app.register_blueprint(tracking_api)
+    app.register_blueprint(iam_api)
+    app.register_blueprint(metrics_api)
 
+    init_db()
+    schema_ready = time.perf_counter()
+    startup_seconds["schema"] = schema_ready - started
 
+    auth_service.reload_credential_cache()
+    tracking_service.warm_up()
+    startup_seconds["warmup"] = time.perf_counter() - schema_ready
+    startup_seconds["total"] = time.perf_counter() - boot_started
 
-app = Flask(__name__)
-app.register_blueprint(tracking_api)
-app.register_blueprint(iam_api)
+    app.logger.info("Startup: " + ", ".join(
+        f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in startup_seconds.items()
+    ))
 
-first_request = True
+    if start_workers:
+        run_workers()
+    return app
 
-@app.before_request
-def setup():
-    global first_request
-    if first_request:
-        first_request = False
-        init_db()
 
+app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000, host="0.0.0.0")
\ No newline at end of file
+    # The debug reloader runs this script twice: a watcher and the serving child (WERKZEUG_RUN_MAIN)
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        run_workers()
+    app.run(debug=True, port=5000, host="0.0.0.0")
@@ -0,0 +1,150 @@
+"""
+Local stand-in for the backend endpoints BackendHttpClient calls.
+
+Every wristband resolves to a student, students share a handful of drivers and each driver
+has one active trip, so the trip chain behaves like a real fleet. Responses are delayed by
+--latency-ms (plus up to --jitter-ms) and a --failure-rate fraction of them answer 503.
+
+    python -m benchmarks.fake_backend --port 18080 --latency-ms 20 --failure-rate 0.05
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeBackendServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open many connections at once; the default backlog of 5 drops SYNs
+    request_queue_size = 256
+
+    def __init__(self, address, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0,
+                 students: int = 200, drivers: int = 10, seed: int = None):
+        super().__init__(address, FakeBackendHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.students = students
+        self.drivers = drivers
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.failures = 0
+        self.posted = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def count(self, endpoint: str) -> None:
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"requests": dict(self.requests), "failures": self.failures, "posted": self.posted,
+                    "max_in_flight": self.max_in_flight}
+
+
+class FakeBackendHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _delay_or_fail(self) -> bool:
+        """Apply the configured latency; True when this request should fail."""
+        server = self.server
+        with server.lock:
+            delay = server.latency + server.random.uniform(0, server.jitter)
+            fail = server.random.random() < server.failure_rate
+            if fail:
+                server.failures += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if delay > 0:
+                time.sleep(delay)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+        if fail:
+            self._send(503, {"error": "Service unavailable"})
+        return fail
+
+    def do_GET(self):
+        server = self.server
+        parts = self.path.strip("/").split("/")
+        if parts[:4] == ["api", "v1", "wristbands", "rfid"] and len(parts) == 5:
+            server.count("wristband")
+            if not self._delay_or_fail():
+                self._send(200, {"rfidCode": parts[4], "student": {"id": zlib.crc32(parts[4].encode()) % server.students + 1}})
+        elif parts[:3] == ["api", "v1", "students"] and len(parts) == 4:
+            server.count("student")
+            if not self._delay_or_fail():
+                student_id = int(parts[3])
+                self._send(200, {"id": student_id, "driverId": student_id % server.drivers + 1})
+        elif parts[:5] == ["api", "v1", "trips", "active", "driver"] and len(parts) == 6:
+            server.count("active_trips")
+            if not self._delay_or_fail():
+                self._send(200, [{"id": int(parts[5]) + 100}])
+        elif parts[:3] == ["api", "v1", "trips"] and len(parts) == 4:
+            server.count("trip")
+            if not self._delay_or_fail():
+                trip_id = int(parts[3])
+                self._send(200, {"id": trip_id, "vehicleId": trip_id + 1000})
+        else:
+            self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.rstrip("/") != "/api/v1/locations":
+            return self._send(404, {"error": "Not found"})
+        server.count("locations")
+        if not self._delay_or_fail():
+            with server.lock:
+                server.posted += 1
+            self._send(201, body)
+
+
+def start_fake_backend(port: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0, failure_rate: float = 0.0,
+                       seed: int = None) -> FakeBackendServer:
+    """Serve the fake backend on a daemon thread; port 0 picks a free port (see server.server_port)."""
+    server = FakeBackendServer(("127.0.0.1", port), latency_ms / 1000, jitter_ms / 1000, failure_rate, seed=seed)
+    threading.Thread(target=server.serve_forever, name="fake-backend", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = start_fake_backend(args.port, args.latency_ms, args.jitter_ms, args.failure_rate, args.seed)
+    print(f"Fake backend listening on http://127.0.0.1:{server.server_port}")
+    try:
+        while True:
+            time.sleep(60)
+            print(json.dumps(server.stats()))
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
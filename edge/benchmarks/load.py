@@ -0,0 +1,172 @@
+"""
+HTTP load generator for the edge service.
+
+Scenarios:
+    post_backend   POST /api/v1/tracking with use_backend true (stored and queued for the backend)
+    post_local     POST /api/v1/tracking with use_backend false
+    get_tracking   GET /api/v1/tracking, first page
+    register       POST /api/v1/register with a fresh RFID code per request
+
+By default the service is started in-process on a temporary database, with the fake backend
+standing in for the real one. Use --target to load an already running instance instead
+(its device credentials are then given with --rfid-code and --api-key).
+
+    python -m benchmarks.load --requests 2000 --concurrency 8 --output load.json
+    python -m benchmarks.load --target http://127.0.0.1:5000 --rfid-code AAABBBCCC --api-key secret-api-key
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_backend import start_fake_backend
+from benchmarks.report import summarize, write_report
+
+SCENARIOS = ("post_backend", "post_local", "get_tracking", "register")
+
+
+def serve_in_process(database_path: str, backend_url: str) -> tuple[str, str, str]:
+    """Start the Flask app on a free port against database_path; returns (url, rfid_code, api_key)."""
+    from shared.infrastructure.database import db, init_db
+    db.init(database_path)
+
+    import app as edge_app
+    from werkzeug.serving import make_server
+
+    # Per-request access logging would dominate the measurements
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    # app.py pins BACKEND_URL at import time, so point the clients at the fake backend here
+    service = edge_app.tracking_service
+    service.backend_url = backend_url
+    service.http_client.base_url = backend_url
+    if service.async_http_client is not None:
+        service.async_http_client.base_url = backend_url
+
+    init_db()
+    # Served like wsgi.py: the forwarder drains the outbox into the fake backend while load runs
+    edge_app.run_workers()
+    device = edge_app.auth_service.register_rfid(f"BENCH-{uuid.uuid4().hex[:12].upper()}")
+
+    server = make_server("127.0.0.1", 0, edge_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="edge-app", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", device.rfid_code, device.api_key
+
+
+def build_request(scenario: str, sequence: int, rfid_code: str, api_key: str, started_at: datetime):
+    """(method, path, json body, headers) for one operation of the scenario."""
+    if scenario in ("post_backend", "post_local"):
+        return "POST", "/api/v1/tracking", {
+            "rfid_code": rfid_code,
+            "latitude": -12.05 + random.uniform(-0.05, 0.05),
+            "longitude": -77.04 + random.uniform(-0.05, 0.05),
+            "speed": random.uniform(0, 60),
+            "created_at": (started_at + timedelta(milliseconds=sequence)).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "use_backend": scenario == "post_backend"
+        }, {"X-API-Key": api_key}
+    if scenario == "get_tracking":
+        return "GET", "/api/v1/tracking?limit=100", None, {}
+    return "POST", "/api/v1/register", {"rfid_code": f"BENCH-{uuid.uuid4().hex.upper()}"}, {}
+
+
+def run_scenario(scenario: str, base_url: str, total: int, concurrency: int, rfid_code: str, api_key: str) -> dict:
+    sequence = itertools.count()
+    latencies: list[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    started_at = datetime.now(timezone.utc)
+
+    def worker():
+        session = requests.Session()
+        local_latencies, local_errors = [], 0
+        while True:
+            index = next(sequence)
+            if index >= total:
+                break
+            method, path, body, headers = build_request(scenario, index, rfid_code, api_key, started_at)
+            begin = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, json=body, headers=headers, timeout=30)
+                failed = response.status_code >= 400
+            except requests.exceptions.RequestException:
+                failed = True
+            local_latencies.append(time.perf_counter() - begin)
+            local_errors += failed
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    begin = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - begin, errors[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="Base URL of a running service; starts one in-process when omitted")
+    parser.add_argument("--rfid-code", help="Device used for tracking posts with --target")
+    parser.add_argument("--api-key", help="API key of that device")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests before each scenario")
+    parser.add_argument("--backend-latency-ms", type=float, default=20.0)
+    parser.add_argument("--backend-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    random.seed(args.seed)
+
+    backend = None
+    if args.target:
+        if not args.rfid_code or not args.api_key:
+            parser.error("--target requires --rfid-code and --api-key")
+        base_url, rfid_code, api_key = args.target.rstrip("/"), args.rfid_code, args.api_key
+    else:
+        backend = start_fake_backend(0, args.backend_latency_ms, failure_rate=args.backend_failure_rate, seed=args.seed)
+        database_path = os.path.join(tempfile.mkdtemp(prefix="edge-bench-"), "edge.db")
+        base_url, rfid_code, api_key = serve_in_process(database_path, f"http://127.0.0.1:{backend.server_port}")
+
+    results = {}
+    for scenario in scenarios:
+        if args.warmup:
+            run_scenario(scenario, base_url, args.warmup, args.concurrency, rfid_code, api_key)
+        results[scenario] = run_scenario(scenario, base_url, args.requests, args.concurrency, rfid_code, api_key)
+        print(f"{scenario}: {results[scenario]['throughput_per_s']} req/s, "
+              f"p99 {results[scenario]['latency_ms']['p99']} ms, {results[scenario]['errors']} errors", file=sys.stderr)
+
+    config = {
+        "target": args.target or "in-process",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup
+    }
+    if backend is not None:
+        config.update(backend_latency_ms=args.backend_latency_ms, backend_failure_rate=args.backend_failure_rate)
+        results["fake_backend"] = backend.stats()
+    write_report("load", config, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Microbenchmarks for the tracking domain service and repository.
+
+Runs against a temporary SQLite database seeded with --rows records spread over --devices
+devices, so the numbers do not depend on the local edugo_edge.db.
+
+    python -m benchmarks.micro --rows 50000 --iterations 2000 --output micro.json
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.report import summarize, write_report
+
+
+def measure(operation, iterations: int) -> dict:
+    """Time each call of operation(i) separately."""
+    latencies = []
+    begin = time.perf_counter()
+    for i in range(iterations):
+        started = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies, time.perf_counter() - begin)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="Tracking records seeded before the read benchmarks")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=500, help="Records per save_many call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    from shared.infrastructure.database import db, init_db
+    db.init(os.path.join(tempfile.mkdtemp(prefix="edge-micro-"), "edge.db"))
+    init_db()
+
+    from tracking.domain.services import TrackingRecordService
+    from tracking.infrastructure.repositories import TrackingRecordRepository
+
+    rng = random.Random(args.seed)
+    service = TrackingRecordService()
+    repository = TrackingRecordRepository()
+    devices = [f"DEV{n:05d}" for n in range(args.devices)]
+    origin = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def make_record(i: int):
+        return service.create_record(
+            devices[i % len(devices)], -12.05 + rng.uniform(-0.1, 0.1), -77.04 + rng.uniform(-0.1, 0.1),
+            rng.uniform(0, 60), (origin + timedelta(seconds=i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        )
+
+    results = {}
+    results["create_record"] = measure(make_record, args.iterations)
+    results["create_record_default_time"] = measure(
+        lambda i: service.create_record("DEV00000", -12.05, -77.04, 30.0, None), args.iterations
+    )
+
+    # Seed the table for the read benchmarks, timing each bulk insert on the way
+    seeded = 0
+
+    def seed_batch(_):
+        nonlocal seeded
+        batch = [make_record(seeded + n) for n in range(min(args.batch_size, args.rows - seeded))]
+        repository.save_many(batch)
+        seeded += len(batch)
+
+    batches = -(-args.rows // args.batch_size)
+    results["save_many"] = measure(seed_batch, batches)
+    results["save_many"]["rows_per_call"] = args.batch_size
+    results["save"] = measure(lambda i: repository.save(make_record(args.rows + i)), args.iterations)
+
+    _, cursor = repository.get_page(args.rows // 2)
+    results["get_page_first"] = measure(lambda i: repository.get_page(100), args.iterations)
+    results["get_page_deep"] = measure(lambda i: repository.get_page(100, cursor=cursor), args.iterations)
+    results["get_page_device"] = measure(
+        lambda i: repository.get_page(100, device_id=devices[i % len(devices)]), args.iterations
+    )
+    results["get_by_device_id"] = measure(
+        lambda i: repository.get_by_device_id(devices[i % len(devices)]), max(args.iterations // 10, 1)
+    )
+    results["get_all"] = measure(lambda i: repository.get_all(), max(args.iterations // 100, 3))
+    results["get_columns"] = measure(lambda i: repository.get_columns(), max(args.iterations // 100, 3))
+    results["get_latest_positions"] = measure(lambda i: repository.get_latest_positions(), args.iterations)
+    results["find_in_area"] = measure(
+        lambda i: repository.find_in_area(-12.06, -12.04, -77.05, -77.03, limit=1000), args.iterations
+    )
+    results["find_near"] = measure(lambda i: repository.find_near(-12.05, -77.04, 500, limit=1000), args.iterations)
+
+    write_report("micro", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Result summaries shared by the benchmark scripts.
+
+Every script writes one JSON document with the commit it ran against, so reports from
+different commits can be diffed or compared side by side.
+"""
+
+import json
+import math
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    """Throughput and latency percentiles (in milliseconds) of latencies given in seconds."""
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "operations": count,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_per_s": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(sum(values) / count * 1000, 3) if count else 0.0,
+            "p50": round(percentile(values, 0.50) * 1000, 3),
+            "p95": round(percentile(values, 0.95) * 1000, 3),
+            "p99": round(percentile(values, 0.99) * 1000, 3),
+            "max": round(values[-1] * 1000, 3) if count else 0.0
+        }
+    }
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(name: str, config: Dict[str, Any], results: Dict[str, Any], output: Optional[str] = None) -> None:
+    """Write the report as JSON to output, or to stdout when no path is given."""
+    report = {
+        "benchmark": name,
+        "commit": current_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": config,
+        "results": results
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as file:
+            file.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
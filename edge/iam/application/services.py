@@ -1,29 +1,134 @@
+import hmac
+import os
 import secrets
 import random
+from datetime import datetime
 
-from iam.infrastructure.models import Device
+from iam.domain.entities import Device
+from iam.infrastructure.cache import DeviceCredentialCache
+from iam.infrastructure.models import Device as DeviceModel
+from shared.infrastructure.database import db
+
+# Devices per multi-row INSERT, kept well below SQLite's bound-variable limit
+BULK_REGISTER_CHUNK_SIZE = 500
+RFID_CODE_MAX_LENGTH = 64
 
 
 def generate_mac_like_code() -> str:
     return ":".join(["{:02X}".format(random.randint(0, 255)) for _ in range(6)])
 
 
+def generate_api_key() -> str:
+    """Random per-device API key: 32 bytes from the OS CSPRNG, URL-safe (43 characters)."""
+    return secrets.token_urlsafe(32)
+
+
 class AuthApplicationService:
+    # Shared by every instance so a registration is immediately visible to all authenticators
+    credential_cache = DeviceCredentialCache(int(os.getenv('DEVICE_CACHE_MAX_SIZE', '100000')))
+
     def register_rfid(self, rfid_code: str):
 
         # Genera api_key única
-        api_key = "secret-api-key"
+        api_key = generate_api_key()
 
-        device = Device.create(
+        device = DeviceModel.create(
             rfid_code=rfid_code,
             api_key=api_key
         )
+        self.credential_cache.put(Device(device.rfid_code, device.api_key, device.registered_at))
         return device
 
+    def register_rfids(self, rfid_codes: list) -> list[dict]:
+        """
+        Register many wristbands at once, with one conflict-ignoring multi-row insert per chunk
+        inside a single transaction, each device getting its own generated API key.
+        Returns one result per given code, in order: {"device": Device} when registered,
+        {"exists": rfid_code} when already registered, {"duplicate": rfid_code} when repeated
+        earlier in the list, or {"error": str} when invalid.
+        """
+        results: list[dict] = [{} for _ in rfid_codes]
+        pending = {}
+        for index, rfid_code in enumerate(rfid_codes):
+            if not isinstance(rfid_code, str) or not rfid_code:
+                results[index] = {"error": "RFID code is required"}
+            elif len(rfid_code) > RFID_CODE_MAX_LENGTH:
+                results[index] = {"error": f"RFID code exceeds {RFID_CODE_MAX_LENGTH} characters"}
+            elif rfid_code in pending:
+                results[index] = {"duplicate": rfid_code}
+            else:
+                pending[rfid_code] = index
+
+        registered_at = datetime.utcnow()
+        devices = [Device(rfid_code, generate_api_key(), registered_at) for rfid_code in pending]
+        registered = []
+        with db.atomic():
+            while devices:
+                inserted = set()
+                for start in range(0, len(devices), BULK_REGISTER_CHUNK_SIZE):
+                    chunk = devices[start:start + BULK_REGISTER_CHUNK_SIZE]
+                    query = DeviceModel.insert_many(
+                        [(device.rfid_code, device.api_key, device.registered_at) for device in chunk],
+                        fields=[DeviceModel.rfid_code, DeviceModel.api_key, DeviceModel.registered_at]
+                    ).on_conflict_ignore().returning(DeviceModel.rfid_code)
+                    inserted.update(row[0] for row in db.execute(query))
+
+                ignored = [device for device in devices if device.rfid_code not in inserted]
+                registered += [device for device in devices if device.rfid_code in inserted]
+                existing = self._existing_rfid_codes([device.rfid_code for device in ignored])
+                for device in ignored:
+                    if device.rfid_code in existing:
+                        results[pending[device.rfid_code]] = {"exists": device.rfid_code}
+                # Anything else was ignored for an API key collision: retry it with a new key
+                devices = [Device(device.rfid_code, generate_api_key(), registered_at)
+                           for device in ignored if device.rfid_code not in existing]
+
+        for device in registered:
+            self.credential_cache.put(device)
+            results[pending[device.rfid_code]] = {"device": device}
+        return results
+
+    @staticmethod
+    def _existing_rfid_codes(rfid_codes: list[str]) -> set[str]:
+        existing = set()
+        for start in range(0, len(rfid_codes), BULK_REGISTER_CHUNK_SIZE):
+            chunk = rfid_codes[start:start + BULK_REGISTER_CHUNK_SIZE]
+            query = DeviceModel.select(DeviceModel.rfid_code).where(DeviceModel.rfid_code.in_(chunk))
+            existing.update(row[0] for row in db.execute(query))
+        return existing
+
+    def reload_credential_cache(self) -> int:
+        """
+        (Re)load device credentials from the devices table, newest registrations first and up
+        to the cache bound. Devices that do not fit are still authenticated on a cache miss.
+        """
+        query = (DeviceModel
+                 .select(DeviceModel.rfid_code, DeviceModel.api_key, DeviceModel.registered_at)
+                 .order_by(DeviceModel.registered_at.desc())
+                 .limit(self.credential_cache.max_size)
+                 .tuples())
+        # Oldest first, so the newest registrations end up as the most recently used entries
+        self.credential_cache.load(Device(*row) for row in reversed(list(query)))
+        return len(self.credential_cache)
+
     def get_device_by_code_and_key(self, rfid_code: str, api_key: str):
-        return Device.get_or_none(Device.rfid_code == rfid_code, Device.api_key == api_key)
+        """Authenticate from the credential cache, falling back to the database on a miss."""
+        if not rfid_code or not api_key:
+            return None
+
+        device = self.credential_cache.get(rfid_code)
+        if device is None:
+            row = DeviceModel.get_or_none(DeviceModel.rfid_code == rfid_code)
+            if row is None:
+                return None
+            device = Device(row.rfid_code, row.api_key, row.registered_at)
+            self.credential_cache.put(device)
+
+        if hmac.compare_digest(device.api_key.encode(), str(api_key).encode()):
+            return device
+        return None
     
     def get_device_by_rfid_code(self, rfid_code: str):
         """Get device by RFID code only."""
-        return Device.get_or_none(Device.rfid_code == rfid_code)
+        return DeviceModel.get_or_none(DeviceModel.rfid_code == rfid_code)
 
@@ -1,6 +1,8 @@
 from datetime import datetime
 
 class Device:
+    __slots__ = ("rfid_code", "api_key", "registered_at")
+
     def __init__(self, rfid_code, api_key, registered_at=None):
         self.rfid_code = rfid_code
         self.api_key = api_key
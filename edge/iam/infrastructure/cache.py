@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from iam.domain.entities import Device
+
+
+class DeviceCredentialCache:
+    """
+    In-memory map of RFID code -> device credentials used to authenticate pings
+    without touching the devices table. Bounded with LRU eviction, so fleets larger
+    than max_size keep their most active devices in memory.
+    """
+
+    def __init__(self, max_size: int = 100000):
+        self.max_size = max_size
+        self._devices: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, devices: Iterable[Device]) -> None:
+        """Replace the cached credentials with the given devices."""
+        loaded: OrderedDict = OrderedDict()
+        for device in devices:
+            loaded[device.rfid_code] = device
+            if len(loaded) > self.max_size:
+                loaded.popitem(last=False)
+        with self._lock:
+            self._devices = loaded
+
+    def get(self, rfid_code: str) -> Optional[Device]:
+        with self._lock:
+            device = self._devices.get(rfid_code)
+            if device is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._devices.move_to_end(rfid_code)
+            return device
+
+    def put(self, device: Device) -> None:
+        with self._lock:
+            self._devices[device.rfid_code] = device
+            self._devices.move_to_end(device.rfid_code)
+            while len(self._devices) > self.max_size:
+                self._devices.popitem(last=False)
+
+    def remove(self, rfid_code: str) -> None:
+        with self._lock:
+            self._devices.pop(rfid_code, None)
+
+    def __len__(self) -> int:
+        return len(self._devices)
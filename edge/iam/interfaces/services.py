@@ -1,9 +1,16 @@
 from flask import Blueprint, request, jsonify
 from iam.application.services import AuthApplicationService
+from shared.infrastructure.database import init_db
+import click
+import csv
+import os
 
-iam_api = Blueprint("iam", __name__)
+iam_api = Blueprint("iam", __name__, cli_group="iam")
 auth_service = AuthApplicationService()
 
+# Upper bound on RFID codes accepted by a single bulk registration request
+register_bulk_max_size = int(os.getenv('IAM_REGISTER_BULK_MAX_SIZE', '10000'))
+
 @iam_api.route("/api/v1/register", methods=["POST"])
 def register_device():
     data = request.json
@@ -25,4 +32,78 @@ def register_device():
         "api_key": device.api_key
     }), 201
 
+@iam_api.route("/api/v1/register/bulk", methods=["POST"])
+def register_devices():
+    """
+    Register many wristbands in one request, e.g. at the start of a school term.
+    Expected JSON: [ "rfid_code", ... ] or { "rfid_codes": [ ... ] }.
+    Each registered device gets its own API key, returned only in this response.
+    Codes already registered are reported as "exists", codes repeated in the request as "duplicate".
+    Responds 201 when every code was registered, 207 when only some were, 409 when none were
+    because all exist already, 400 otherwise.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("rfid_codes")
+    if not isinstance(data, list) or not data:
+        return jsonify({"error": "A non-empty array of RFID codes is required"}), 400
+    if len(data) > register_bulk_max_size:
+        return jsonify({"error": f"Request exceeds the maximum of {register_bulk_max_size} RFID codes"}), 413
+
+    items = []
+    counts = {"registered": 0, "exists": 0, "duplicate": 0, "error": 0}
+    for index, (rfid_code, result) in enumerate(zip(data, auth_service.register_rfids(data))):
+        if "device" in result:
+            counts["registered"] += 1
+            items.append({"index": index, "rfid_code": rfid_code, "status": "registered",
+                          "api_key": result["device"].api_key})
+        elif "error" in result:
+            counts["error"] += 1
+            items.append({"index": index, "rfid_code": rfid_code, "status": "error", "error": result["error"]})
+        else:
+            status = "exists" if "exists" in result else "duplicate"
+            counts[status] += 1
+            items.append({"index": index, "rfid_code": rfid_code, "status": status})
+
+    if counts["registered"] == len(data):
+        status = 201
+    elif counts["registered"]:
+        status = 207
+    else:
+        status = 400 if counts["error"] else 409
+    return jsonify({
+        "registered": counts["registered"],
+        "existing": counts["exists"],
+        "duplicates": counts["duplicate"],
+        "failed": counts["error"],
+        "results": items
+    }), status
+
+@iam_api.cli.command("register-bulk")
+@click.argument("source", type=click.File("r"), default="-")
+@click.option("--output", type=click.File("w"), default="-", help="CSV of rfid_code,status,api_key; stdout by default.")
+def register_bulk_command(source, output):
+    """
+    Register the RFID codes listed in SOURCE (one per line, or the first column of a CSV;
+    blank lines and lines starting with # are skipped).
+    """
+    rfid_codes = []
+    for row in csv.reader(source):
+        if row and row[0].strip() and not row[0].lstrip().startswith("#"):
+            rfid_codes.append(row[0].strip())
+
+    init_db()
+    results = auth_service.register_rfids(rfid_codes)
 
+    writer = csv.writer(output)
+    writer.writerow(["rfid_code", "status", "api_key"])
+    registered = 0
+    for rfid_code, result in zip(rfid_codes, results):
+        if "device" in result:
+            registered += 1
+            writer.writerow([rfid_code, "registered", result["device"].api_key])
+        elif "error" in result:
+            writer.writerow([rfid_code, f"error: {result['error']}", ""])
+        else:
+            writer.writerow([rfid_code, "exists" if "exists" in result else "duplicate", ""])
+    click.echo(f"Registered {registered} of {len(rfid_codes)} RFID codes", err=True)
@@ -9,6 +9,56 @@ from peewee import SqliteDatabase
 # Initialize SQLite database
 db = SqliteDatabase('edugo_edge.db')
 
+# Pragmas applied when tracking records are written behind in group commits:
+# WAL lets readers proceed during a flush and synchronous=NORMAL only fsyncs on checkpoints
+WRITE_BEHIND_PRAGMAS = (
+    ('journal_mode', 'wal'),
+    ('synchronous', 'normal'),
+    ('cache_size', -16000),
+    ('temp_store', 'memory'),
+    ('busy_timeout', 5000),
+)
+
+def enable_write_behind_pragmas() -> None:
+    """
+    Switch the database to WAL journaling and apply the write-behind pragmas to every connection.
+    """
+    for key, value in WRITE_BEHIND_PRAGMAS:
+        db.pragma(key, value, permanent=True)
+
+def incremental_vacuum(pages: int) -> int:
+    """
+    Return up to pages free pages to the file system; returns how many were released.
+    Each call is one short write transaction, so it can run between ingest writes.
+    Only effective once auto_vacuum is incremental (new databases, or after vacuum_full()).
+    """
+    before = db.pragma('freelist_count')
+    # The pragma frees one page per step and cursor.execute() steps once, so run it as a script
+    db.connection().executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+    return before - db.pragma('freelist_count')
+
+def vacuum_full() -> None:
+    """
+    Rebuild the whole file with VACUUM, switching it to incremental auto_vacuum on the way.
+    Blocks every writer until done; meant for an operator, e.g. once on an old database.
+    """
+    db.pragma('auto_vacuum', 'incremental')
+    db.execute_sql('VACUUM')
+
+def storage_stats() -> dict:
+    """Size of the database file and of its free space, in pages and bytes."""
+    page_size = db.pragma('page_size')
+    page_count = db.pragma('page_count')
+    freelist_count = db.pragma('freelist_count')
+    return {
+        "page_size": page_size,
+        "pages": page_count,
+        "free_pages": freelist_count,
+        "size_bytes": page_size * page_count,
+        "free_bytes": page_size * freelist_count,
+        "auto_vacuum": ("none", "full", "incremental")[db.pragma('auto_vacuum')]
+    }
+
 def init_db() -> None:
     """
     Initialize the database and create tables for Device model.
@@ -17,10 +67,32 @@ def init_db() -> None:
         db.connect()
 
     # Existence check for Device model
-    from tracking.infrastructure.models import TrackingRecord
+    from tracking.infrastructure.models import TrackingRecord, OutboxEntry, LatestPosition, MinuteRollup, DailyRollup
+    from tracking.infrastructure.schema import (
+        create_spatial_index, upgrade_dedup_keys, upgrade_outbox_trips, upgrade_record_ids, create_read_view
+    )
     from iam.infrastructure.models import Device
 
-    db.create_tables([TrackingRecord], safe=True)
+    # New databases give freed pages back in small steps (see incremental_vacuum); the mode
+    # can only be chosen before the first table is created
+    if not db.get_tables():
+        db.pragma('auto_vacuum', 'incremental')
+
+    db.create_tables([OutboxEntry], safe=True)
+    upgrade_outbox_trips()
+    db.create_tables([LatestPosition], safe=True)
     db.create_tables([Device], safe=True)
 
+    # Existing tracking tables get the idempotency column and keys before their indexes are created
+    upgrade_dedup_keys()
+    upgrade_record_ids()
+    db.create_tables([TrackingRecord], safe=True)
+
+    # R*Tree and triggers over tracking_records
+    create_spatial_index()
+
+    # Read view over the live table and its partitions, and the rollups that outlive them
+    create_read_view()
+    db.create_tables([MinuteRollup, DailyRollup], safe=True)
+
     db.close()
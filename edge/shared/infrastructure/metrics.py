@@ -0,0 +1,201 @@
+"""
+In-process metrics for Edugo Edge Service.
+
+Counters and histograms are kept in memory and rendered in the Prometheus text format.
+Values computed on demand (cache sizes, queue depths) are registered as callbacks
+and only evaluated when the metrics are scraped.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterable, Optional
+
+# Latency buckets in seconds, from 100 microseconds up to 30 seconds
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (stage, seconds) pairs timed during the current request, when Server-Timing is requested
+_request_timings: ContextVar[Optional[list]] = ContextVar("request_timings", default=None)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS,
+                 timing_prefix: str = ""):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # Prepended to the first label value to name the Server-Timing entry
+        self.timing_prefix = timing_prefix
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels) -> "Timer":
+        """Context manager observing the duration of its block."""
+        return Timer(self, labels)
+
+    def timed(self, *labels) -> Callable:
+        """Decorator observing the duration of every call."""
+        def decorator(function: Callable) -> Callable:
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with Timer(self, labels):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_label = 'le="' + le + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, bucket_label)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+class Timer:
+    """
+    Times a block into a histogram. When the current request collects Server-Timing
+    entries, the duration is also reported there under the first label value.
+    """
+
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self.started
+        self.histogram.observe(elapsed, *self.labels)
+        timings = _request_timings.get()
+        if timings is not None:
+            name = self.labels[0] if self.labels else self.histogram.name
+            timings.append((self.histogram.timing_prefix + name, elapsed))
+
+
+class _Callback:
+    def __init__(self, name: str, documentation: str, type_name: str, labelnames: tuple,
+                 collect: Callable[[], Iterable[tuple]]):
+        self.name = name
+        self.documentation = documentation
+        self.type_name = type_name
+        self.labelnames = labelnames
+        self.collect = collect
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.collect():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class MetricsRegistry:
+    """Named metrics of the process; registering an existing name returns the existing metric."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS, timing_prefix: str = "") -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets, timing_prefix))
+
+    def register_callback(self, name: str, documentation: str, collect: Callable[[], Iterable[tuple]],
+                          labelnames: tuple = (), type_name: str = "gauge") -> None:
+        """
+        Register values computed at scrape time. collect returns (label values, value) pairs.
+        A later registration under the same name replaces the earlier one.
+        """
+        with self._lock:
+            self._metrics[name] = _Callback(name, documentation, type_name, labelnames, collect)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def start_request_timing() -> object:
+    """Start collecting Server-Timing entries for the current request; returns a reset token."""
+    return _request_timings.set([])
+
+
+def finish_request_timing(token: object) -> list:
+    """Stop collecting and return the (stage, seconds) pairs timed during the request."""
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    return timings
@@ -0,0 +1,48 @@
+from flask import Blueprint, Response, g, request
+from shared.infrastructure.metrics import registry, start_request_timing, finish_request_timing
+import os
+import time
+
+metrics_api = Blueprint("metrics_api", __name__)
+
+# Server-Timing header: "request" adds it when the request sends X-Server-Timing: 1,
+# "always" adds it to every response and "off" disables it
+server_timing_mode = os.getenv('METRICS_SERVER_TIMING', 'request').lower()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "edge_http_request_seconds", "Duration of HTTP requests by route", ("method", "route")
+)
+HTTP_RESPONSES = registry.counter("edge_http_responses_total", "HTTP responses by route and status", ("route", "status"))
+
+def wants_server_timing() -> bool:
+    if server_timing_mode == 'always':
+        return True
+    return server_timing_mode == 'request' and request.headers.get('X-Server-Timing') == '1'
+
+@metrics_api.before_app_request
+def start_timer():
+    g.request_started = time.perf_counter()
+    g.timing_token = start_request_timing() if wants_server_timing() else None
+
+@metrics_api.after_app_request
+def record_request(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    HTTP_REQUEST_SECONDS.observe(elapsed, request.method, route)
+    HTTP_RESPONSES.inc(route, str(response.status_code))
+
+    token = g.pop('timing_token', None)
+    if token is not None:
+        entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in finish_request_timing(token)]
+        # Streamed responses are still running here, so their total covers the first chunk only
+        entries.append(f"total;dur={elapsed * 1000:.3f}")
+        response.headers['Server-Timing'] = ", ".join(entries)
+    return response
+
+@metrics_api.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Prometheus text exposition of the service metrics."""
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
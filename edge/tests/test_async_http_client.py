@@ -0,0 +1,66 @@
+import asyncio
+import unittest
+
+from benchmarks.fake_backend import start_fake_backend
+from tracking.infrastructure.asyncHttpClient import AsyncBackendHttpClient
+from tracking.infrastructure.resilience import CircuitBreaker, CircuitOpenError
+
+
+class AsyncBackendHttpClientTest(unittest.TestCase):
+    """AsyncBackendHttpClient against the stand-in backend of benchmarks/fake_backend.py."""
+
+    def start(self, latency_ms: float = 0.0, failure_rate: float = 0.0, **client_options) -> AsyncBackendHttpClient:
+        self.server = start_fake_backend(latency_ms=latency_ms, failure_rate=failure_rate, seed=1)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        client = AsyncBackendHttpClient(f"http://127.0.0.1:{self.server.server_port}", "test-token", **client_options)
+        self.addCleanup(client.close)
+        return client
+
+    def test_identical_lookups_are_coalesced(self):
+        client = self.start(latency_ms=100)
+
+        async def lookups():
+            return await asyncio.gather(*(client.get_wristband_by_rfid("AAABBBCCC") for _ in range(10)))
+
+        results = client.run(lookups(), timeout=10)
+
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(self.server.stats()["requests"], {"wristband": 1})
+        self.assertEqual(client.requests_sent, 1)
+        self.assertEqual(client.coalesced, 9)
+
+    def test_concurrency_stays_within_pool_size(self):
+        client = self.start(latency_ms=50, pool_size=4)
+
+        async def lookups():
+            return await asyncio.gather(*(client.get_student_by_id(student_id) for student_id in range(1, 21)))
+
+        results = client.run(lookups(), timeout=10)
+
+        self.assertEqual([result["id"] for result in results], list(range(1, 21)))
+        stats = self.server.stats()
+        self.assertEqual(stats["requests"], {"student": 20})
+        self.assertGreater(stats["max_in_flight"], 1)
+        self.assertLessEqual(stats["max_in_flight"], 4)
+
+    def test_circuit_breaker_reports_failures(self):
+        client = self.start(failure_rate=1.0, circuit_breaker=CircuitBreaker(failure_threshold=3))
+
+        for trip_id in range(1, 4):
+            with self.assertRaises(ValueError):
+                client.run(client.get_trip_by_id(trip_id), timeout=10)
+        with self.assertRaises(CircuitOpenError):
+            client.run(client.get_trip_by_id(4), timeout=10)
+
+        stats = client.stats()
+        self.assertEqual(stats["state"], CircuitBreaker.OPEN)
+        self.assertEqual(stats["consecutive_failures"], 3)
+        self.assertEqual(stats["rejected"], 1)
+        self.assertEqual(stats["requests_sent"], 3)
+        self.assertEqual(self.server.stats()["failures"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
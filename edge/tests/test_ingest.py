@@ -0,0 +1,41 @@
+import json
+import unittest
+
+from tracking.interfaces.ingest import UnsupportedMediaTypeError, decode_ingest_body
+
+
+class DecodeIngestBodyTest(unittest.TestCase):
+    """Content negotiation of the tracking ingest endpoints."""
+
+    ping = {"rfid_code": "AAABBBCCC", "latitude": 1.0, "longitude": 2.0, "speed": 3.0}
+
+    def test_json_types_are_decoded(self):
+        body = json.dumps(self.ping).encode()
+        for mimetype in ("application/json", "APPLICATION/JSON", "application/json; charset=utf-8",
+                         "application/vnd.edge+json", "application/merge-patch+json", None, ""):
+            with self.subTest(mimetype=mimetype):
+                self.assertEqual(decode_ingest_body(mimetype, body), self.ping)
+
+    def test_unsupported_types_are_rejected(self):
+        body = json.dumps(self.ping).encode()
+        for mimetype in ("application/xml", "text/json+xml", "text/vnd.edge+json", "application/jsonp"):
+            with self.subTest(mimetype=mimetype):
+                with self.assertRaises(UnsupportedMediaTypeError):
+                    decode_ingest_body(mimetype, body)
+
+    def test_line_protocol_only_where_allowed(self):
+        body = b"AAABBBCCC,1,2,3"
+        with self.assertRaises(UnsupportedMediaTypeError):
+            decode_ingest_body("text/plain", body)
+        # Numbers stay text until the same validation as every other format converts them
+        self.assertEqual(decode_ingest_body("text/plain", body, allow_line_protocol=True),
+                         [{"rfid_code": "AAABBBCCC", "latitude": "1", "longitude": "2", "speed": "3"}])
+
+    def test_malformed_json_is_a_bad_request(self):
+        with self.assertRaises(ValueError) as raised:
+            decode_ingest_body("application/vnd.edge+json", b"{")
+        self.assertNotIsInstance(raised.exception, UnsupportedMediaTypeError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import logging
+import threading
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from tracking.domain.services import NoActiveTripError
+from tracking.infrastructure.httpClient import BackendHttpClient
+from tracking.infrastructure.repositories import OutboxRepository
+from tracking.infrastructure.resilience import CircuitOpenError
+
+
+class BackendForwarder:
+    """
+    Background worker that drains the tracking outbox into the backend.
+
+    Each cycle takes up to batch_size due entries, posts them with the trip stored at ingest
+    (resolving it through the cached RFID chain when none was stored) and marks the delivered
+    ones in a single update. Failed entries are retried with exponential backoff and parked as
+    "failed" after max_attempts. Entries whose device has no active trip are parked as
+    "no_trip" right away, without charging an attempt, until they are replayed.
+    Entries are claimed with a lease of lease_seconds, so forwarders in several processes
+    never post the same entry concurrently.
+    Delivery is at-least-once: a crash between the post and the update re-sends the entry
+    once its lease has expired.
+    While the backend circuit is open the cycle stops early without charging attempts.
+    With prefetch_trip_data set, the batch's distinct devices are resolved up front in one
+    concurrent call, so the per-entry lookups are served from the trip cache.
+    """
+
+    def __init__(self, outbox_repository: OutboxRepository, resolve_trip_data: Callable[[str], Dict[str, Any]],
+                 http_client: BackendHttpClient, batch_size: int = 50, poll_interval: float = 2.0,
+                 base_backoff: float = 5.0, max_backoff: float = 900.0, max_attempts: int = 20,
+                 delivered_retention: timedelta = timedelta(hours=24), lease_seconds: float = 600.0,
+                 prefetch_trip_data: Optional[Callable[[Iterable[str]], Any]] = None):
+        self.outbox_repository = outbox_repository
+        self.resolve_trip_data = resolve_trip_data
+        self.http_client = http_client
+        self.prefetch_trip_data = prefetch_trip_data
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.delivered_retention = delivered_retention
+        self.lease_seconds = lease_seconds
+
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="tracking-forwarder", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def backoff(self, attempts: int) -> float:
+        """Delay before the next attempt after the given number of failed attempts."""
+        return min(self.base_backoff * (2 ** max(attempts - 1, 0)), self.max_backoff)
+
+    def drain_once(self) -> int:
+        """Forward one batch of due entries; returns how many entries were processed."""
+        entries = self.outbox_repository.claim_due(self.batch_size, self.lease_seconds)
+        delivered = []
+        processed = 0
+
+        unresolved = {entry.device_id for entry in entries if entry.trip_id is None or entry.vehicle_id is None}
+        if unresolved and self.prefetch_trip_data is not None:
+            try:
+                self.prefetch_trip_data(unresolved)
+            except Exception as e:
+                logging.warning(f"Trip data prefetch failed: {e}")
+
+        for entry in entries:
+            try:
+                if entry.trip_id is not None and entry.vehicle_id is not None:
+                    trip_id, vehicle_id = entry.trip_id, entry.vehicle_id
+                else:
+                    trip_data = self.resolve_trip_data(entry.device_id)
+                    trip_id, vehicle_id = trip_data['trip_id'], trip_data['vehicle_id']
+                self.http_client.post_tracking_to_backend({
+                    'vehicleId': vehicle_id,
+                    'tripId': trip_id,
+                    'latitude': entry.latitude,
+                    'longitude': entry.longitude,
+                    'speed': entry.speed,
+                    'timestamp': entry.timestamp
+                })
+                delivered.append(entry.id)
+            except CircuitOpenError as e:
+                logging.warning(f"Backend unavailable, pausing outbox delivery: {e}")
+                self.outbox_repository.release([entry.id for entry in entries[processed:]])
+                break
+            except NoActiveTripError as e:
+                self.outbox_repository.mark_no_trip(entry, str(e))
+                logging.warning(f"Parked outbox entry {entry.id} until it is replayed: {e}")
+            except Exception as e:
+                attempts = entry.attempts + 1
+                give_up = attempts >= self.max_attempts
+                self.outbox_repository.mark_retry(entry, str(e), self.backoff(attempts), give_up)
+                logging.warning(f"Forwarding outbox entry {entry.id} failed (attempt {attempts}): {e}")
+            processed += 1
+
+        self.outbox_repository.mark_delivered(delivered)
+        return processed
+
+    def _run(self) -> None:
+        cycles = 0
+        while not self._stopping.is_set():
+            try:
+                processed = self.drain_once()
+                cycles += 1
+                if cycles % 1000 == 0:
+                    self.outbox_repository.purge_delivered(self.delivered_retention)
+            except Exception as e:
+                logging.error(f"Outbox forwarder cycle failed: {e}")
+                processed = 0
+
+            # Keep draining while there is a backlog, otherwise wait for new entries
+            if processed < self.batch_size:
+                self._stopping.wait(self.poll_interval)
@@ -0,0 +1,105 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from shared.infrastructure.database import incremental_vacuum, storage_stats, vacuum_full
+from tracking.infrastructure.repositories import PartitionRepository, RollupRepository
+from tracking.infrastructure.schema import PARTITION_PERIODS, period_start
+
+
+class TrackingMaintenance:
+    """
+    Background storage maintenance of the tracking history.
+
+    Each cycle seals the periods (days or ISO weeks) that ended more than grace ago into
+    partitions, rolling their records up into per-minute and per-day summaries, then drops
+    partitions older than raw_retention and rollups older than rollup_retention, and finally
+    hands the freed pages back to the file system with incremental vacuum. Every step works
+    in short transactions, so ingest keeps writing while a cycle runs.
+    """
+
+    def __init__(self, partition_repository: PartitionRepository, rollup_repository: RollupRepository,
+                 period: str = "week", grace: timedelta = timedelta(hours=24),
+                 raw_retention: Optional[timedelta] = None, rollup_retention: Optional[timedelta] = None,
+                 chunk_size: int = 500, vacuum_pages: int = 256, vacuum_pause: float = 0.05,
+                 interval: float = 3600.0):
+        if period not in PARTITION_PERIODS:
+            raise ValueError(f"Partition period must be one of: {', '.join(PARTITION_PERIODS)}")
+        self.partition_repository = partition_repository
+        self.rollup_repository = rollup_repository
+        self.period = period
+        self.grace = grace
+        self.raw_retention = raw_retention
+        self.rollup_retention = rollup_retention
+        self.chunk_size = chunk_size
+        self.vacuum_pages = vacuum_pages
+        self.vacuum_pause = vacuum_pause
+        self.interval = interval
+        self.last_run: Optional[Dict[str, Any]] = None
+
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._running = threading.Lock()
+        self._thread = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="tracking-maintenance", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self, full_vacuum: bool = False) -> Dict[str, Any]:
+        """Run one maintenance cycle and return what it did; cycles never overlap."""
+        with self._running:
+            now = datetime.now(timezone.utc)
+            result: Dict[str, Any] = {"started_at": now.isoformat()}
+
+            sealed_before = period_start(now - self.grace, self.period)
+            result["sealed_before"] = sealed_before.isoformat()
+            result["records_sealed"] = self.partition_repository.seal(sealed_before, self.period, self.chunk_size)
+
+            result["partitions_dropped"] = []
+            if self.raw_retention is not None:
+                result["partitions_dropped"] = self.partition_repository.drop_ended_before(now - self.raw_retention)
+            result["rollups_purged"] = 0
+            if self.rollup_retention is not None:
+                result["rollups_purged"] = self.rollup_repository.purge_before(now - self.rollup_retention)
+
+            if full_vacuum:
+                vacuum_full()
+                result["pages_vacuumed"] = None
+            else:
+                result["pages_vacuumed"] = self._vacuum()
+
+            result["duration_s"] = round((datetime.now(timezone.utc) - now).total_seconds(), 3)
+            self.last_run = result
+            return result
+
+    def _vacuum(self) -> int:
+        """Release free pages vacuum_pages at a time, pausing in between so writers get the lock."""
+        if storage_stats()["auto_vacuum"] != "incremental":
+            return 0
+        released = 0
+        while not self._stopping.is_set():
+            pages = incremental_vacuum(self.vacuum_pages)
+            if not pages:
+                break
+            released += pages
+            self._stopping.wait(self.vacuum_pause)
+        return released
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                result = self.run_once()
+                logging.info(f"Tracking maintenance: {result}")
+            except Exception as e:
+                logging.error(f"Tracking maintenance cycle failed: {e}")
+            self._stopping.wait(self.interval)
@@ -1,33 +1,343 @@
 from tracking.domain.entities import TrackingRecord
-from tracking.domain.services import TrackingRecordService
-from tracking.infrastructure.repositories import TrackingRecordRepository
-from tracking.infrastructure.httpClient import BackendHttpClient
+from tracking.domain.services import DuplicateRecordError, NoActiveTripError, TrackingRecordService, parse_flag
+from tracking.domain.simplification import TrajectorySimplifier
+from tracking.infrastructure.repositories import (
+    DUPLICATES, TrackingRecordRepository, OutboxRepository, PartitionRepository, RollupRepository
+)
+from tracking.infrastructure.schema import PARTITION_PERIODS
+from tracking.infrastructure.write_buffer import TrackingWriteBuffer
+from tracking.infrastructure.httpClient import BackendHttpClient, BackendNotFoundError
+from tracking.infrastructure.resilience import CircuitBreaker, CircuitOpenError, RetryBudget
+from tracking.infrastructure.cache import RecentKeySet, TripResolutionCache
+from tracking.infrastructure.pubsub import Subscription
+from tracking.application.forwarder import BackendForwarder
+from tracking.application.maintenance import TrackingMaintenance
 from iam.application.services import AuthApplicationService
-from typing import Dict, Any, Optional
+from shared.infrastructure.database import enable_write_behind_pragmas, storage_stats
+from shared.infrastructure.metrics import registry
+from typing import TYPE_CHECKING, Callable, Dict, Any, Iterable, Iterator, Optional, Sequence
+from datetime import timedelta
 import os
-from datetime import datetime
+
+if TYPE_CHECKING:
+    from tracking.infrastructure.asyncHttpClient import AsyncBackendHttpClient
+
+STAGE_SECONDS = registry.histogram(
+    "edge_tracking_stage_seconds", "Duration of each stage of tracking ingest and trip resolution", ("stage",)
+)
 
 class TrackingRecordApplicationService:
     """Application service for vehicle tracking records."""
 
     def __init__(self, backend_url: str = None, jwt_token: str = None):
-        self.tracking_repository = TrackingRecordRepository()
+        # Flushes resolve the repository late, so the buffer can be built before it
+        self.write_buffer = self._create_write_buffer(
+            lambda records, forward: self.tracking_repository.save_many(records, forward)
+        )
+        # Outbox entries store the trip of each ping when it is already cached
+        self.tracking_repository = TrackingRecordRepository(self.write_buffer, trip_lookup=self.get_cached_trip)
         self.tracking_service = TrackingRecordService()
+        self.simplifier = self._create_simplifier()
         self.auth_service = AuthApplicationService()
 
+        # Fan-out of committed records to live stream subscribers
+        self.live_updates = TrackingRecordRepository.updates
+        self.live_updates.max_subscribers = int(os.getenv('TRACKING_STREAM_MAX_SUBSCRIBERS', '100'))
+        self.live_updates.max_queue_size = int(os.getenv('TRACKING_STREAM_QUEUE_SIZE', '256'))
+
+        # Keys of recently stored pings, so reader retries are answered without a write
+        self.recent_keys = RecentKeySet(max_size=int(os.getenv('TRACKING_DEDUP_WINDOW', '50000')))
+
         # Initialize HTTP client for backend communication
         self.backend_url = backend_url or os.getenv('BACKEND_URL', 'http://localhost:8080')
-        self.http_client = BackendHttpClient(self.backend_url, jwt_token)
+        self.http_client = BackendHttpClient(
+            self.backend_url,
+            jwt_token,
+            connect_timeout=float(os.getenv('BACKEND_CONNECT_TIMEOUT', '3.05')),
+            read_timeout=float(os.getenv('BACKEND_READ_TIMEOUT', '10')),
+            pool_size=int(os.getenv('BACKEND_POOL_SIZE', '10')),
+            max_retries=int(os.getenv('BACKEND_MAX_RETRIES', '2')),
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv('BACKEND_BREAKER_FAILURES', '5')),
+                recovery_timeout=float(os.getenv('BACKEND_BREAKER_RECOVERY', '30'))
+            ),
+            retry_budget=RetryBudget(ratio=float(os.getenv('BACKEND_RETRY_BUDGET_RATIO', '0.1')))
+        )
+        self.async_http_client = self._create_async_http_client(jwt_token)
+        self.resolve_concurrency = int(os.getenv('BACKEND_RESOLVE_CONCURRENCY', '16'))
+
+        # Cache for the RFID -> trip chain; negative results expire sooner than positive ones
+        self.trip_cache = TripResolutionCache(
+            max_size=int(os.getenv('TRIP_CACHE_MAX_SIZE', '1024')),
+            ttl=float(os.getenv('TRIP_CACHE_TTL', '300')),
+            negative_ttl=float(os.getenv('TRIP_CACHE_NEGATIVE_TTL', '30')),
+            negative_errors=(BackendNotFoundError,)
+        )
+
+        # Background delivery of outbox entries to the backend
+        self.outbox_repository = OutboxRepository()
+        self.forwarder = BackendForwarder(
+            self.outbox_repository,
+            self.get_trip_data_from_rfid,
+            self.http_client,
+            batch_size=int(os.getenv('TRACKING_OUTBOX_BATCH_SIZE', '50')),
+            poll_interval=float(os.getenv('TRACKING_OUTBOX_POLL_INTERVAL', '2.0')),
+            base_backoff=float(os.getenv('TRACKING_OUTBOX_BASE_BACKOFF', '5')),
+            max_backoff=float(os.getenv('TRACKING_OUTBOX_MAX_BACKOFF', '900')),
+            max_attempts=int(os.getenv('TRACKING_OUTBOX_MAX_ATTEMPTS', '20')),
+            lease_seconds=float(os.getenv('TRACKING_OUTBOX_LEASE_SECONDS', '600')),
+            prefetch_trip_data=self.resolve_trip_data_many if self.async_http_client is not None else None
+        )
+
+        # Partitioning, rollups, retention and vacuum of the tracking history
+        self.rollup_repository = RollupRepository()
+        self.partition_repository = PartitionRepository()
+        self.maintenance = self._create_maintenance()
+
+        self._register_metrics()
+
+    def _register_metrics(self) -> None:
+        """Expose cache, queue and circuit breaker state on /metrics; read only when scraped."""
+        caches = {
+            "credentials": self.auth_service.credential_cache,
+            "recent_pings": self.recent_keys,
+            "wristbands": self.trip_cache.wristbands,
+            "students": self.trip_cache.students,
+            "active_trips": self.trip_cache.active_trips,
+            "trips": self.trip_cache.trips
+        }
+        registry.register_callback(
+            "edge_cache_requests_total", "Cache lookups by cache and result",
+            lambda: [((name, "hit"), cache.hits) for name, cache in caches.items()]
+                    + [((name, "miss"), cache.misses) for name, cache in caches.items()],
+            ("cache", "result"), "counter"
+        )
+        registry.register_callback(
+            "edge_backend_circuit_state", "1 for the current state of the backend circuit breaker",
+            lambda: [((state,), int(state == self.http_client.circuit_breaker.state))
+                     for state in (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN)],
+            ("state",)
+        )
+        registry.register_callback(
+            "edge_outbox_entries", "Outbox entries by delivery status",
+            lambda: [((status,), count) for status, count in self.outbox_repository.count_by_status().items()],
+            ("status",)
+        )
+        # Record counts need a scan of every table, so they are only served by get_storage_stats()
+        registry.register_callback(
+            "edge_tracking_partitions", "Partition tables holding sealed tracking history",
+            lambda: [((), self.partition_repository.count())]
+        )
+        registry.register_callback(
+            "edge_stream_subscribers", "Clients connected to the live location stream",
+            lambda: [((), len(self.live_updates))]
+        )
+        registry.register_callback(
+            "edge_stream_records_total", "Records published to live subscribers, and dropped from full queues",
+            lambda: [(("published",), self.live_updates.published), (("dropped",), self.live_updates.dropped)],
+            ("result",), "counter"
+        )
+        if self.write_buffer is not None:
+            registry.register_callback(
+                "edge_write_buffer_depth", "Tracking records waiting for a group commit",
+                lambda: [((), self.write_buffer.depth())]
+            )
+
+    @staticmethod
+    def _create_write_buffer(flush: Callable[[list[TrackingRecord], Sequence[bool]], list]) -> Optional[TrackingWriteBuffer]:
+        """Build the write-behind buffer when TRACKING_WRITE_BEHIND is enabled."""
+        if os.getenv('TRACKING_WRITE_BEHIND', 'false').lower() not in ('1', 'true', 'yes'):
+            return None
+
+        enable_write_behind_pragmas()
+        return TrackingWriteBuffer(
+            flush,
+            max_queue_size=int(os.getenv('TRACKING_WRITE_BEHIND_QUEUE_SIZE', '10000')),
+            batch_size=int(os.getenv('TRACKING_WRITE_BEHIND_BATCH_SIZE', '500')),
+            flush_interval=float(os.getenv('TRACKING_WRITE_BEHIND_FLUSH_INTERVAL', '0.5')),
+            put_timeout=float(os.getenv('TRACKING_WRITE_BEHIND_PUT_TIMEOUT', '2.0'))
+        )
+
+    def _create_async_http_client(self, jwt_token: str = None) -> Optional["AsyncBackendHttpClient"]:
+        """Build the aiohttp-based client when BACKEND_ASYNC_CLIENT is enabled; it shares the circuit breaker."""
+        if os.getenv('BACKEND_ASYNC_CLIENT', 'false').lower() not in ('1', 'true', 'yes'):
+            return None
+
+        # Imported here so asyncio stays out of startup unless the async client is enabled
+        from tracking.infrastructure.asyncHttpClient import AsyncBackendHttpClient
+
+        return AsyncBackendHttpClient(
+            self.backend_url,
+            jwt_token,
+            connect_timeout=float(os.getenv('BACKEND_CONNECT_TIMEOUT', '3.05')),
+            read_timeout=float(os.getenv('BACKEND_READ_TIMEOUT', '10')),
+            pool_size=int(os.getenv('BACKEND_ASYNC_POOL_SIZE', '20')),
+            circuit_breaker=self.http_client.circuit_breaker
+        )
+
+    def start_forwarder(self) -> None:
+        """Start draining the outbox; entries left from a previous run are picked up too."""
+        self.forwarder.start()
+
+    def warm_up(self) -> None:
+        """Load what the first requests would otherwise read from disk, i.e. the latest positions."""
+        self.tracking_repository.get_latest_positions()
+
+    def replay_outbox(self, status: str = "no_trip") -> int:
+        """Queue the outbox entries parked as no_trip (or failed) for delivery again; returns how many."""
+        if status not in ("no_trip", "failed"):
+            raise ValueError("Only no_trip and failed outbox entries can be replayed")
+        return self.outbox_repository.requeue(status)
+
+    def get_outbox_stats(self) -> Dict[str, int]:
+        """Outbox entry counts by status (pending, delivered, failed, no_trip)."""
+        return self.outbox_repository.count_by_status()
+
+    def _create_maintenance(self) -> TrackingMaintenance:
+        """Build the storage maintenance from the TRACKING_* settings; retention 0 keeps data forever."""
+        period = os.getenv('TRACKING_PARTITION_PERIOD', 'week').lower()
+        if period not in PARTITION_PERIODS:
+            raise ValueError(f"TRACKING_PARTITION_PERIOD must be one of: {', '.join(PARTITION_PERIODS)}")
+        raw_retention_days = float(os.getenv('TRACKING_RAW_RETENTION_DAYS', '0'))
+        rollup_retention_days = float(os.getenv('TRACKING_ROLLUP_RETENTION_DAYS', '0'))
+
+        return TrackingMaintenance(
+            self.partition_repository,
+            self.rollup_repository,
+            period=period,
+            grace=timedelta(hours=float(os.getenv('TRACKING_PARTITION_GRACE_HOURS', '24'))),
+            raw_retention=timedelta(days=raw_retention_days) if raw_retention_days > 0 else None,
+            rollup_retention=timedelta(days=rollup_retention_days) if rollup_retention_days > 0 else None,
+            chunk_size=int(os.getenv('TRACKING_SEAL_CHUNK_SIZE', '500')),
+            vacuum_pages=int(os.getenv('TRACKING_VACUUM_PAGES', '256')),
+            vacuum_pause=float(os.getenv('TRACKING_VACUUM_PAUSE', '0.05')),
+            interval=float(os.getenv('TRACKING_MAINTENANCE_INTERVAL', '3600'))
+        )
+
+    def start_maintenance(self) -> None:
+        """Start the periodic storage maintenance when TRACKING_MAINTENANCE is enabled."""
+        if os.getenv('TRACKING_MAINTENANCE', 'false').lower() in ('1', 'true', 'yes'):
+            self.maintenance.start()
+
+    def run_maintenance(self, full_vacuum: bool = False) -> Dict[str, Any]:
+        """Run one maintenance cycle now (seal, retention, vacuum) and return what it did."""
+        return self.maintenance.run_once(full_vacuum)
+
+    def get_storage_stats(self) -> Dict[str, Any]:
+        """Partitions with their record counts, database file usage and the last maintenance run."""
+        return {
+            "period": self.maintenance.period,
+            "tables": self.partition_repository.stats(),
+            "database": storage_stats(),
+            "last_maintenance": self.maintenance.last_run
+        }
+
+    def get_rollups(self, device_id: str, resolution: str = "minute", since: str = None, until: str = None,
+                    limit: int = None) -> list:
+        """Minute or day summaries of a device's sealed history."""
+        since_bound = self.tracking_service.parse_time_bound(since)
+        until_bound = self.tracking_service.parse_time_bound(until)
+        if resolution == "minute":
+            return self.rollup_repository.get_minutes(device_id, since_bound, until_bound, limit)
+        if resolution == "day":
+            return self.rollup_repository.get_days(device_id, since_bound, until_bound, limit)
+        raise ValueError("resolution must be 'minute' or 'day'")
+
+    @staticmethod
+    def _create_simplifier() -> Optional[TrajectorySimplifier]:
+        """Build the ingest trajectory simplifier when TRACKING_SIMPLIFY is enabled."""
+        if os.getenv('TRACKING_SIMPLIFY', 'false').lower() not in ('1', 'true', 'yes'):
+            return None
+
+        return TrajectorySimplifier(
+            distance_meters=float(os.getenv('TRACKING_DEADBAND_METERS', '15')),
+            speed_delta=float(os.getenv('TRACKING_DEADBAND_SPEED', '5')),
+            heading_degrees=float(os.getenv('TRACKING_DEADBAND_HEADING', '20')),
+            stop_speed=float(os.getenv('TRACKING_STOP_SPEED', '1')),
+            max_interval=float(os.getenv('TRACKING_HEARTBEAT_INTERVAL', '120')),
+            max_gap=float(os.getenv('TRACKING_SEGMENT_MAX_GAP', '600')),
+            tolerance_meters=float(os.getenv('TRACKING_SIMPLIFY_TOLERANCE_METERS', '5')),
+            max_segment_points=int(os.getenv('TRACKING_SEGMENT_MAX_POINTS', '500'))
+        )
+
+    def _ingest(self, rfid_code: str, api_key: str, latitude: float, longitude: float, speed: float,
+                created_at: Optional[str], forward: bool, message_id: Optional[str] = None) -> Optional[TrackingRecord]:
+        """
+        Authenticate, validate and store one ping, timing each stage.
+        Raises DuplicateRecordError when the ping was already stored.
+        """
+        with STAGE_SECONDS.time("auth"):
+            device = self.authenticate_device(rfid_code, api_key)
+        if not device:
+            raise ValueError("Invalid authentication credentials")
+
+        # Use the device's RFID code as device_id
+        with STAGE_SECONDS.time("validate"):
+            record = self.tracking_service.create_record(
+                device.rfid_code, latitude, longitude, speed, created_at, message_id
+            )
+
+        key = self.tracking_service.idempotency_key(record)
+        if self.recent_keys.seen(key):
+            DUPLICATES.inc("memory")
+            raise DuplicateRecordError("Tracking record already stored")
+
+        # Keys are only remembered once stored, so a failed write can still be retried
+        try:
+            saved = self._store(record, forward)
+        except DuplicateRecordError:
+            self.recent_keys.add([key])
+            raise
+        self.recent_keys.add([key])
+        return saved
+
+    def _store(self, record: TrackingRecord, forward: bool) -> Optional[TrackingRecord]:
+        """Persist a validated record, or return None when the simplifier finds it redundant."""
+        if self.simplifier is not None:
+            with STAGE_SECONDS.time("simplify"):
+                accepted = self.simplifier.accept(record)
+            if not accepted:
+                return None
+
+        with STAGE_SECONDS.time("store"):
+            saved = self.tracking_repository.save(record, forward)
+        if self.simplifier is not None:
+            with STAGE_SECONDS.time("compact"):
+                self._compact(self.simplifier.record_kept(saved))
+        return saved
+
+    def _compact(self, redundant: list[TrackingRecord]) -> None:
+        """Delete stored records that Douglas-Peucker dropped from a closed segment."""
+        # Records still waiting in the write buffer have no id yet and are simply kept
+        record_ids = [record.id for record in redundant if record.id is not None]
+        if record_ids:
+            self.tracking_repository.delete_many(record_ids)
+
+    def get_backend_stats(self) -> Dict[str, Any]:
+        """Circuit breaker state of the backend HTTP client."""
+        stats = self.http_client.stats()
+        if self.async_http_client is not None:
+            stats["async"] = self.async_http_client.stats()
+        return stats
+
+    def get_write_buffer_stats(self) -> Dict[str, Any]:
+        """Queue depth and flush counters of the write-behind buffer."""
+        if self.write_buffer is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.write_buffer.stats()}
 
     def authenticate_device(self, rfid_code: str, api_key: str):
         """Authenticate device using IAM service."""
         return self.auth_service.get_device_by_code_and_key(rfid_code, api_key)
     
+    @STAGE_SECONDS.timed("trip_lookup")
     def get_trip_data_from_rfid(self, rfid_code: str) -> Dict[str, Any]:
         """Get trip data from RFID following the complete chain."""
         try:
             # Step 1: Get wristband by RFID
-            wristband_data = self.http_client.get_wristband_by_rfid(rfid_code)
+            wristband_data = self.trip_cache.wristbands.get_or_load(
+                rfid_code, self.http_client.get_wristband_by_rfid, lambda data: not data.get('student')
+            )
             
             if not wristband_data.get('student'):
                 raise ValueError("No student found for this RFID")
@@ -35,7 +345,9 @@ class TrackingRecordApplicationService:
             student_id = wristband_data['student']['id']
             
             # Step 2: Get student details
-            student_data = self.http_client.get_student_by_id(student_id)
+            student_data = self.trip_cache.students.get_or_load(
+                student_id, self.http_client.get_student_by_id, lambda data: not data.get('driverId')
+            )
             
             if not student_data.get('driverId'):
                 raise ValueError("No driver assigned to this student")
@@ -43,16 +355,20 @@ class TrackingRecordApplicationService:
             driver_id = student_data['driverId']
             
             # Step 3: Get active trips for driver
-            active_trips = self.http_client.get_active_trips_by_driver(driver_id)
+            active_trips = self.trip_cache.active_trips.get_or_load(
+                driver_id, self.http_client.get_active_trips_by_driver, lambda trips: not trips
+            )
             
             if not active_trips:
-                raise ValueError("No active trips found for this driver")
+                raise NoActiveTripError("No active trips found for this driver")
             
             # Assume we take the first active trip
             trip_id = active_trips[0]['id']
             
             # Step 4: Get trip details to get vehicle ID
-            trip_data = self.http_client.get_trip_by_id(trip_id)
+            trip_data = self.trip_cache.trips.get_or_load(
+                trip_id, self.http_client.get_trip_by_id, lambda data: not data.get('vehicleId')
+            )
             
             if not trip_data.get('vehicleId'):
                 raise ValueError("No vehicle assigned to this trip")
@@ -65,65 +381,258 @@ class TrackingRecordApplicationService:
                 'trip_data': trip_data
             }
             
+        except (CircuitOpenError, NoActiveTripError):
+            raise
         except Exception as e:
             raise ValueError(f"Failed to get trip data: {str(e)}")
 
-    def create_tracking_record_with_backend(self, rfid_code: str, api_key: str, latitude: float, longitude: float, speed: float = 0, created_at: str = None) -> TrackingRecord:
-        """Create tracking record and post to backend with complete data chain."""
-        
-        # Authenticate device first
-        device = self.authenticate_device(rfid_code, api_key)
-        if not device:
-            raise ValueError("Invalid authentication credentials")
+    def get_cached_trip(self, rfid_code: str) -> Optional[Dict[str, Any]]:
+        """Trip and vehicle of an RFID when every link of its chain is cached, else None; never calls the backend."""
+        found, wristband_data = self.trip_cache.wristbands.peek(rfid_code)
+        if not found or not wristband_data.get('student'):
+            return None
+        found, student_data = self.trip_cache.students.peek(wristband_data['student']['id'])
+        if not found or not student_data.get('driverId'):
+            return None
+        found, active_trips = self.trip_cache.active_trips.peek(student_data['driverId'])
+        if not found or not active_trips:
+            return None
+        trip_id = active_trips[0]['id']
+        found, trip_data = self.trip_cache.trips.peek(trip_id)
+        if not found or not trip_data.get('vehicleId'):
+            return None
+        return {'trip_id': trip_id, 'vehicle_id': trip_data['vehicleId']}
 
-        
+    async def _get_trip_data_from_rfid_async(self, rfid_code: str) -> Dict[str, Any]:
+        """get_trip_data_from_rfid() on the async client; lookups shared with other RFIDs are coalesced."""
+        client = self.async_http_client
         try:
-            # Get trip data from RFID chain
-            trip_data = self.get_trip_data_from_rfid(rfid_code)
-            
-            # Create local tracking record
-            record = self.tracking_service.create_record(device.rfid_code, latitude, longitude, speed, created_at)
-            saved_record = self.tracking_repository.save(record)
-            
-            # Prepare data for backend
-            timestamp = created_at or datetime.now().isoformat() + "Z"
-            backend_tracking_data = {
-                'vehicleId': trip_data['vehicle_id'],
-                'tripId': trip_data['trip_id'],
-                'latitude': latitude,
-                'longitude': longitude,
-                'speed': speed,
-                'timestamp': timestamp
+            wristband_data = await self.trip_cache.wristbands.get_or_load_async(
+                rfid_code, client.get_wristband_by_rfid, lambda data: not data.get('student')
+            )
+            if not wristband_data.get('student'):
+                raise ValueError("No student found for this RFID")
+
+            student_id = wristband_data['student']['id']
+            student_data = await self.trip_cache.students.get_or_load_async(
+                student_id, client.get_student_by_id, lambda data: not data.get('driverId')
+            )
+            if not student_data.get('driverId'):
+                raise ValueError("No driver assigned to this student")
+
+            driver_id = student_data['driverId']
+            active_trips = await self.trip_cache.active_trips.get_or_load_async(
+                driver_id, client.get_active_trips_by_driver, lambda trips: not trips
+            )
+            if not active_trips:
+                raise NoActiveTripError("No active trips found for this driver")
+
+            trip_id = active_trips[0]['id']
+            trip_data = await self.trip_cache.trips.get_or_load_async(
+                trip_id, client.get_trip_by_id, lambda data: not data.get('vehicleId')
+            )
+            if not trip_data.get('vehicleId'):
+                raise ValueError("No vehicle assigned to this trip")
+
+            return {
+                'vehicle_id': trip_data['vehicleId'],
+                'trip_id': trip_id,
+                'student_data': student_data,
+                'wristband_data': wristband_data,
+                'trip_data': trip_data
             }
-            
-            # Post to backend
-            backend_response = self.http_client.post_tracking_to_backend(backend_tracking_data)
-            
-            # Log successful backend post
-            print(f"Successfully posted tracking to backend: {backend_response}")
-            
-            return saved_record
-            
+
+        except (CircuitOpenError, NoActiveTripError):
+            raise
         except Exception as e:
-            # If backend fails, still save locally
-            print(f"Backend operation failed, saving locally only: {str(e)}")
-            record = self.tracking_service.create_record(device.rfid_code, latitude, longitude, speed, created_at)
-            return self.tracking_repository.save(record)
-
-    def create_tracking_record(self, rfid_code: str, api_key: str, latitude: float, longitude: float, speed: float, created_at: str) -> TrackingRecord:
-        """Create and persist a tracking record with authentication."""
-        # Authenticate device first
-        device = self.authenticate_device(rfid_code, api_key)
-        if not device:
-            raise ValueError("Invalid authentication credentials")
-        
-        # Use the device's RFID code as device_id
-        record = self.tracking_service.create_record(device.rfid_code, latitude, longitude, speed, created_at)
-        return self.tracking_repository.save(record)
+            raise ValueError(f"Failed to get trip data: {str(e)}")
+
+    async def _resolve_trip_data_many_async(self, rfid_codes: list[str]) -> Dict[str, Any]:
+        import asyncio
+        semaphore = asyncio.Semaphore(self.resolve_concurrency)
+
+        async def resolve(rfid_code: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._get_trip_data_from_rfid_async(rfid_code)
+
+        results = await asyncio.gather(*(resolve(rfid_code) for rfid_code in rfid_codes), return_exceptions=True)
+        return dict(zip(rfid_codes, results))
+
+    def resolve_trip_data_many(self, rfid_codes: Iterable[str]) -> Dict[str, Any]:
+        """
+        Resolve the trip chain of many RFIDs at once, mapping each code to its trip data or to
+        the exception raised for it. With BACKEND_ASYNC_CLIENT enabled the chains run concurrently,
+        at most BACKEND_RESOLVE_CONCURRENCY at a time; otherwise one after another.
+        """
+        rfid_codes = list(dict.fromkeys(rfid_codes))
+        if self.async_http_client is not None:
+            return self.async_http_client.run(self._resolve_trip_data_many_async(rfid_codes))
+
+        results = {}
+        for rfid_code in rfid_codes:
+            try:
+                results[rfid_code] = self.get_trip_data_from_rfid(rfid_code)
+            except ValueError as e:
+                results[rfid_code] = e
+        return results
+
+    def invalidate_trip_cache(self, rfid_code: str = None, student_id: int = None, driver_id: int = None,
+                              trip_id: int = None) -> None:
+        """Forget cached chain lookups, e.g. after a wristband is reassigned or a trip ends."""
+        self.trip_cache.invalidate(rfid_code, student_id, driver_id, trip_id)
+
+    def create_tracking_record_with_backend(self, rfid_code: str, api_key: str, latitude: float, longitude: float, speed: float = 0, created_at: str = None,
+                                            message_id: str = None) -> TrackingRecord:
+        """
+        Create tracking record and queue it for the backend.
+
+        The local record and its outbox entry are committed together; the background
+        forwarder resolves the trip chain and posts it, so ingest never waits on the backend.
+        Returns None when trajectory simplification drops the ping and raises
+        DuplicateRecordError when it was already stored.
+        """
+        return self._ingest(rfid_code, api_key, latitude, longitude, speed, created_at, True, message_id)
+
+    def create_tracking_record(self, rfid_code: str, api_key: str, latitude: float, longitude: float, speed: float, created_at: str,
+                               message_id: str = None) -> TrackingRecord:
+        """
+        Create and persist a tracking record with authentication; None when the ping is simplified away,
+        DuplicateRecordError when it was already stored.
+        """
+        return self._ingest(rfid_code, api_key, latitude, longitude, speed, created_at, False, message_id)
+
+    def create_tracking_records_batch(self, api_key: str, pings: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+        """
+        Validate a batch of pings and persist the valid ones in a single transaction.
+
+        Each distinct RFID code is authenticated once per batch. Pings with use_backend (default
+        true, as on the single endpoint) are also queued in the outbox. Returns one result per ping,
+        in request order: {"record": TrackingRecord} when stored, {"suppressed": TrackingRecord} when
+        trajectory simplification dropped it, {"duplicate": TrackingRecord} when it was already stored
+        (or repeated within the batch), or {"error": str} when rejected.
+        """
+        results: list[Dict[str, Any]] = [{} for _ in pings]
+        devices = {}
+        accepted = []
+        redundant = []
+        keys = set()
+
+        for index, ping in enumerate(pings):
+            try:
+                rfid_code = ping["rfid_code"]
+                if rfid_code not in devices:
+                    devices[rfid_code] = self.authenticate_device(rfid_code, api_key)
+                device = devices[rfid_code]
+                if not device:
+                    raise ValueError("Invalid authentication credentials")
+                forward = parse_flag(ping.get("use_backend", True), "use_backend")
+
+                record = self.tracking_service.create_record(
+                    device.rfid_code, ping["latitude"], ping["longitude"], ping["speed"], ping.get("created_at"),
+                    ping.get("message_id")
+                )
+                key = self.tracking_service.idempotency_key(record)
+                if key in keys or self.recent_keys.seen(key):
+                    DUPLICATES.inc("memory")
+                    results[index] = {"duplicate": record}
+                    continue
+                keys.add(key)
+                if self.simplifier is not None:
+                    if not self.simplifier.accept(record):
+                        results[index] = {"suppressed": record}
+                        continue
+                    redundant += self.simplifier.record_kept(record)
+                accepted.append((index, record, forward))
+            except KeyError:
+                results[index] = {"error": "Missing required fields"}
+            except (TypeError, AttributeError):
+                results[index] = {"error": "Invalid input format"}
+            except ValueError as e:
+                results[index] = {"error": str(e)}
+
+        with STAGE_SECONDS.time("store"):
+            saved_records = self.tracking_repository.save_many(
+                [record for _, record, _ in accepted], [forward for _, _, forward in accepted]
+            )
+        self.recent_keys.add(keys)
+        for (index, record, _), saved in zip(accepted, saved_records):
+            results[index] = {"record": saved} if saved is not None else {"duplicate": record}
+        with STAGE_SECONDS.time("compact"):
+            self._compact(redundant)
+
+        return results
 
     def get_all_locations(self) -> list[TrackingRecord]:
         return self.tracking_repository.get_all()
     
+    def get_location_columns(self, device_id: str = None, since: str = None, until: str = None,
+                             as_numpy: bool = False):
+        """Matching tracking records as parallel columns (or a NumPy structured array) for analytics."""
+        return self.tracking_repository.get_columns(
+            device_id,
+            self.tracking_service.parse_time_bound(since),
+            self.tracking_service.parse_time_bound(until),
+            as_numpy
+        )
+
+    def get_locations_page(self, limit: int, cursor: str = None, device_id: str = None, since: str = None,
+                           until: str = None) -> tuple[list[TrackingRecord], Optional[str]]:
+        """Get one keyset page of tracking records and the cursor of the next page."""
+        return self.tracking_repository.get_page(
+            limit,
+            cursor=cursor,
+            device_id=device_id,
+            since=self.tracking_service.parse_time_bound(since),
+            until=self.tracking_service.parse_time_bound(until)
+        )
+
+    def find_locations_in_area(self, min_lat, max_lat, min_lon, max_lon, since: str = None, until: str = None,
+                               limit: int = 1000) -> list[TrackingRecord]:
+        """Tracking records inside a bounding box and optional time window."""
+        box = self.tracking_service.validate_area(min_lat, max_lat, min_lon, max_lon)
+        return self.tracking_repository.find_in_area(
+            *box, self.tracking_service.parse_time_bound(since), self.tracking_service.parse_time_bound(until), limit
+        )
+
+    def find_devices_in_area(self, min_lat, max_lat, min_lon, max_lon, since: str = None,
+                             until: str = None) -> list[str]:
+        """Devices seen inside a bounding box during an optional time window."""
+        box = self.tracking_service.validate_area(min_lat, max_lat, min_lon, max_lon)
+        return self.tracking_repository.find_devices_in_area(
+            *box, self.tracking_service.parse_time_bound(since), self.tracking_service.parse_time_bound(until)
+        )
+
+    def find_locations_near(self, latitude, longitude, radius, since: str = None, until: str = None,
+                            limit: int = 1000) -> list[tuple[TrackingRecord, float]]:
+        """Tracking records within radius metres of a point, with their distance in metres."""
+        circle = self.tracking_service.validate_circle(latitude, longitude, radius)
+        return self.tracking_repository.find_near(
+            *circle, self.tracking_service.parse_time_bound(since), self.tracking_service.parse_time_bound(until), limit
+        )
+
+    def subscribe_locations(self, device_ids: list[str] = None) -> Subscription:
+        """
+        Subscribe to records as they are committed, for every device or only device_ids.
+        Raises SubscriberLimitError when TRACKING_STREAM_MAX_SUBSCRIBERS are already connected;
+        the caller must close() the subscription.
+        """
+        return self.live_updates.subscribe(device_ids)
+
+    def get_latest_locations(self, device_ids: list[str] = None) -> list[TrackingRecord]:
+        """Last known position of every device, or of the given devices."""
+        return self.tracking_repository.get_latest_positions(device_ids)
+
+    def export_locations(self, chunk_size: int, device_id: str = None, since: str = None, until: str = None,
+                         after_id: int = None) -> Iterator[TrackingRecord]:
+        """
+        Stream tracking records for export, resuming after after_id when given.
+        Arguments are validated before the first row is read.
+        """
+        since_bound = self.tracking_service.parse_time_bound(since)
+        until_bound = self.tracking_service.parse_time_bound(until)
+        cursor = self.tracking_repository.cursor_after(after_id) if after_id is not None else None
+        return self.tracking_repository.iter_records(chunk_size, cursor, device_id, since_bound, until_bound)
+
     def get_locations_by_device(self, rfid_code: str, api_key: str) -> list[TrackingRecord]:
         """Get tracking records for authenticated device."""
         device = self.authenticate_device(rfid_code, api_key)
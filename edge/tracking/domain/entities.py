@@ -1,12 +1,48 @@
-from datetime import datetime
+from datetime import date, datetime
 
 class TrackingRecord:
     """Domain entity representing a vehicle's GPS record."""
 
-    def __init__(self, device_id: str, latitude: float, longitude: float, speed: float, created_at: datetime, id: int = None):
+    # No per-instance __dict__: large reads hold one of these per row
+    __slots__ = ("id", "device_id", "latitude", "longitude", "speed", "created_at", "message_id")
+
+    def __init__(self, device_id: str, latitude: float, longitude: float, speed: float, created_at: datetime, id: int = None,
+                 message_id: str = None):
         self.id = id
         self.device_id = device_id
         self.latitude = latitude
         self.longitude = longitude
         self.speed = speed
         self.created_at = created_at
+        # Optional client-assigned id; a retried ping carries the same one
+        self.message_id = message_id
+
+class MinuteSummary:
+    """Average position and speed of a device over one minute, from the rollups."""
+
+    __slots__ = ("device_id", "minute", "points", "latitude", "longitude", "average_speed", "max_speed")
+
+    def __init__(self, device_id: str, minute: datetime, points: int, latitude: float, longitude: float,
+                 average_speed: float, max_speed: float):
+        self.device_id = device_id
+        self.minute = minute
+        self.points = points
+        self.latitude = latitude
+        self.longitude = longitude
+        self.average_speed = average_speed
+        self.max_speed = max_speed
+
+class DailySummary:
+    """Points recorded and distance travelled by a device over one UTC day, from the rollups."""
+
+    __slots__ = ("device_id", "day", "points", "distance_meters", "max_speed", "first_at", "last_at")
+
+    def __init__(self, device_id: str, day: date, points: int, distance_meters: float, max_speed: float,
+                 first_at: datetime, last_at: datetime):
+        self.device_id = device_id
+        self.day = day
+        self.points = points
+        self.distance_meters = distance_meters
+        self.max_speed = max_speed
+        self.first_at = first_at
+        self.last_at = last_at
@@ -1,12 +1,77 @@
 from datetime import datetime, timezone
-from dateutil.parser import parse
 from tracking.domain.entities import TrackingRecord
+import math
+
+# Longest client message id accepted for idempotent ingest
+MESSAGE_ID_MAX_LENGTH = 128
+
+EARTH_RADIUS_METERS = 6371008.8
+METERS_PER_DEGREE_LATITUDE = 111320.0
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parse a timestamp string. ISO 8601, what clients send, goes through datetime.fromisoformat;
+    anything else falls back to dateutil, which is only imported when first needed.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        from dateutil.parser import parse
+        return parse(value)
+
+_TRUE_FLAGS = ("1", "true", "yes", "on")
+_FALSE_FLAGS = ("0", "false", "no", "off")
+
+def parse_flag(value, name: str) -> bool:
+    """
+    Parse a boolean option such as use_backend: JSON booleans, 0/1, or the usual string forms
+    (true/false, yes/no, on/off, 1/0) from query strings and text bodies. Raises ValueError otherwise.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        flag = value.strip().lower()
+        if flag in _TRUE_FLAGS:
+            return True
+        if flag in _FALSE_FLAGS:
+            return False
+    raise ValueError(f"{name} must be a boolean")
+
+def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in metres between two WGS84 points."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+def bounding_box(latitude: float, longitude: float, radius_meters: float) -> tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lon, max_lon) enclosing a circle, used to pre-filter radius queries."""
+    d_lat = radius_meters / METERS_PER_DEGREE_LATITUDE
+    cos_lat = math.cos(math.radians(latitude))
+    d_lon = 180.0 if cos_lat < 1e-6 else min(180.0, radius_meters / (METERS_PER_DEGREE_LATITUDE * cos_lat))
+    return (
+        max(-90.0, latitude - d_lat),
+        min(90.0, latitude + d_lat),
+        max(-180.0, longitude - d_lon),
+        min(180.0, longitude + d_lon)
+    )
+
+class DuplicateRecordError(ValueError):
+    """Raised for a ping that was already stored; ingest answers it as a success."""
+
+class NoActiveTripError(ValueError):
+    """Raised when a wristband's driver has no active trip to attribute a ping to."""
 
 class TrackingRecordService:
     """Business logic for vehicle GPS tracking."""
 
     @staticmethod
-    def create_record(device_id: str, latitude: float, longitude: float, speed: float, created_at: str | None) -> TrackingRecord:
+    def create_record(device_id: str, latitude: float, longitude: float, speed: float,
+                      created_at: str | float | datetime | None, message_id: str | int | None = None) -> TrackingRecord:
         try:
             lat = float(latitude)
             lon = float(longitude)
@@ -18,12 +83,71 @@ class TrackingRecordService:
             if not (sp >= 0):
                 raise ValueError("Speed must be a non-negative value")
 
-            if created_at:
-                created_time = parse(created_at).astimezone(timezone.utc)
-            else:
+            if not created_at:
                 created_time = datetime.now(timezone.utc)
+            elif isinstance(created_at, datetime):
+                created_time = created_at.astimezone(timezone.utc)
+            elif isinstance(created_at, (int, float)) and not isinstance(created_at, bool):
+                # Unix epoch seconds, as sent by the compact ingest formats
+                created_time = datetime.fromtimestamp(created_at, timezone.utc)
+            else:
+                created_time = parse_timestamp(created_at).astimezone(timezone.utc)
 
         except Exception:
             raise ValueError("Invalid input format")
 
-        return TrackingRecord(device_id, lat, lon, speed, created_time)
+        if message_id is not None:
+            if isinstance(message_id, bool) or not isinstance(message_id, (str, int)):
+                raise ValueError("message_id must be a string or an integer")
+            message_id = str(message_id)
+            if not 0 < len(message_id) <= MESSAGE_ID_MAX_LENGTH:
+                raise ValueError(f"message_id must be 1 to {MESSAGE_ID_MAX_LENGTH} characters long")
+
+        return TrackingRecord(device_id, lat, lon, sp, created_time, message_id=message_id)
+
+    @staticmethod
+    def idempotency_key(record: TrackingRecord) -> tuple:
+        """
+        Key identifying retries of the same ping: the device and its message id when the
+        client sent one, otherwise the device and the ping time.
+        """
+        if record.message_id is not None:
+            return record.device_id, record.message_id
+        return record.device_id, record.created_at
+
+    @staticmethod
+    def parse_time_bound(value: str | None) -> datetime | None:
+        """Parse a query time bound to an aware UTC datetime; naive values are taken as UTC."""
+        if not value:
+            return None
+        try:
+            bound = parse_timestamp(value)
+        except (ValueError, OverflowError):
+            raise ValueError(f"Invalid timestamp: {value}")
+        if bound.tzinfo is None:
+            return bound.replace(tzinfo=timezone.utc)
+        return bound.astimezone(timezone.utc)
+
+    @staticmethod
+    def validate_area(min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> tuple[float, float, float, float]:
+        """Validate a bounding box given as query values."""
+        try:
+            box = (float(min_lat), float(max_lat), float(min_lon), float(max_lon))
+        except (TypeError, ValueError):
+            raise ValueError("min_lat, max_lat, min_lon and max_lon are required numbers")
+        if not (-90 <= box[0] <= box[1] <= 90) or not (-180 <= box[2] <= box[3] <= 180):
+            raise ValueError("Invalid bounding box")
+        return box
+
+    @staticmethod
+    def validate_circle(latitude: float, longitude: float, radius: float) -> tuple[float, float, float]:
+        """Validate a centre point and radius in metres given as query values."""
+        try:
+            circle = (float(latitude), float(longitude), float(radius))
+        except (TypeError, ValueError):
+            raise ValueError("lat, lon and radius are required numbers")
+        if not (-90 <= circle[0] <= 90) or not (-180 <= circle[1] <= 180):
+            raise ValueError("Invalid latitude or longitude values")
+        if not circle[2] > 0:
+            raise ValueError("radius must be a positive number of metres")
+        return circle
@@ -0,0 +1,193 @@
+import math
+import threading
+from datetime import timezone
+from typing import Optional
+
+from tracking.domain.entities import TrackingRecord
+from tracking.domain.services import EARTH_RADIUS_METERS, haversine_meters
+
+
+def bearing_degrees(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Initial bearing from the first point to the second, in degrees clockwise from north."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_lambda = math.radians(lon2 - lon1)
+    y = math.sin(d_lambda) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(d_lambda)
+    return (math.degrees(math.atan2(y, x)) + 360.0) % 360.0
+
+
+def heading_change(a: float, b: float) -> float:
+    """Smallest angle between two bearings."""
+    diff = abs(a - b) % 360.0
+    return 360.0 - diff if diff > 180.0 else diff
+
+
+def douglas_peucker(points: list[tuple[float, float]], tolerance_meters: float) -> list[int]:
+    """
+    Indices of the points kept by Douglas-Peucker simplification with the given error bound.
+    Points are (latitude, longitude), projected onto a local plane around the first point;
+    the first and last points are always kept.
+    """
+    if len(points) <= 2:
+        return list(range(len(points)))
+
+    lat0 = math.radians(points[0][0])
+    cos_lat0 = math.cos(lat0)
+    xy = [
+        (math.radians(lon) * cos_lat0 * EARTH_RADIUS_METERS, math.radians(lat) * EARTH_RADIUS_METERS)
+        for lat, lon in points
+    ]
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = xy[first], xy[last]
+        dx, dy = x2 - x1, y2 - y1
+        length = math.hypot(dx, dy)
+
+        max_distance, index = -1.0, first
+        for i in range(first + 1, last):
+            px, py = xy[i]
+            if length == 0:
+                distance = math.hypot(px - x1, py - y1)
+            else:
+                distance = abs(dy * px - dx * py + x2 * y1 - y2 * x1) / length
+            if distance > max_distance:
+                max_distance, index = distance, i
+
+        if max_distance > tolerance_meters:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [i for i, kept in enumerate(keep) if kept]
+
+
+class _DeviceTrack:
+    __slots__ = ("last", "heading", "moving", "segment")
+
+    def __init__(self, record: TrackingRecord, moving: bool):
+        self.last = record
+        self.heading = None
+        self.moving = moving
+        self.segment: list[TrackingRecord] = []
+
+
+class TrajectorySimplifier:
+    """
+    Per-device trajectory compression applied at ingest.
+
+    accept() drops a ping that stays inside the dead-band of the device's last kept ping:
+    closer than distance_meters, speed within speed_delta, heading within heading_degrees
+    and less than max_interval seconds later (so a parked bus still sends a heartbeat).
+    Stop and start events (speed crossing stop_speed) are always kept.
+
+    Kept pings form the device's open segment. A stop or start event, a coverage gap longer
+    than max_gap seconds or reaching max_segment_points closes it. Closed segments are run through
+    Douglas-Peucker, which never drops segment endpoints, and record_kept returns the stored
+    records that can be removed while the route stays within tolerance_meters of the original.
+    """
+
+    def __init__(self, distance_meters: float = 15.0, speed_delta: float = 5.0, heading_degrees: float = 20.0,
+                 stop_speed: float = 1.0, max_interval: float = 120.0, max_gap: float = 600.0,
+                 tolerance_meters: float = 5.0, max_segment_points: int = 500):
+        self.distance_meters = distance_meters
+        self.speed_delta = speed_delta
+        self.heading_degrees = heading_degrees
+        self.stop_speed = stop_speed
+        self.max_interval = max_interval
+        self.max_gap = max_gap
+        self.tolerance_meters = tolerance_meters
+        self.max_segment_points = max_segment_points
+        self._tracks: dict[str, _DeviceTrack] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _seconds_between(earlier: TrackingRecord, later: TrackingRecord) -> float:
+        a, b = earlier.created_at, later.created_at
+        if a.tzinfo is None:
+            a = a.replace(tzinfo=timezone.utc)
+        if b.tzinfo is None:
+            b = b.replace(tzinfo=timezone.utc)
+        return (b - a).total_seconds()
+
+    def accept(self, record: TrackingRecord) -> bool:
+        """Whether the ping carries new information and must be stored."""
+        with self._lock:
+            track = self._tracks.get(record.device_id)
+            moving = float(record.speed) > self.stop_speed
+            if track is None:
+                return True
+
+            last = track.last
+            elapsed = self._seconds_between(last, record)
+            if elapsed < 0 or elapsed >= self.max_interval or moving != track.moving:
+                # Late or out-of-order ping, heartbeat, or stop/start event
+                return True
+
+            distance = haversine_meters(last.latitude, last.longitude, record.latitude, record.longitude)
+            if distance >= self.distance_meters:
+                return True
+            if abs(float(record.speed) - float(last.speed)) >= self.speed_delta:
+                return True
+            if moving and track.heading is not None and distance > 1.0:
+                heading = bearing_degrees(last.latitude, last.longitude, record.latitude, record.longitude)
+                if heading_change(track.heading, heading) >= self.heading_degrees:
+                    return True
+            return False
+
+    def record_kept(self, record: TrackingRecord) -> list[TrackingRecord]:
+        """
+        Register a stored ping. Returns the records of the segment it closed, if any, that
+        Douglas-Peucker found redundant.
+        """
+        with self._lock:
+            moving = float(record.speed) > self.stop_speed
+            track = self._tracks.get(record.device_id)
+            if track is None:
+                track = self._tracks[record.device_id] = _DeviceTrack(record, moving)
+                track.segment.append(record)
+                return []
+
+            elapsed = self._seconds_between(track.last, record)
+            if elapsed < 0:
+                # Late ping from a buffered backlog: stored as is, outside segment tracking
+                return []
+
+            closed: list[TrackingRecord] = []
+            if elapsed >= self.max_gap:
+                # Gap in coverage: close at the previous ping and start over
+                closed = track.segment
+                track.segment = [record]
+            else:
+                track.segment.append(record)
+                # Stop and start events end a segment, so they are always segment endpoints
+                if moving != track.moving or len(track.segment) >= self.max_segment_points:
+                    closed = track.segment
+                    track.segment = [record]
+
+            if track.last.latitude != record.latitude or track.last.longitude != record.longitude:
+                track.heading = bearing_degrees(track.last.latitude, track.last.longitude,
+                                                record.latitude, record.longitude)
+            track.last = record
+            track.moving = moving
+
+        return self.redundant_points(closed)
+
+    def redundant_points(self, segment: list[TrackingRecord]) -> list[TrackingRecord]:
+        """Interior records of a closed segment that Douglas-Peucker drops."""
+        if len(segment) <= 2:
+            return []
+        kept = set(douglas_peucker([(r.latitude, r.longitude) for r in segment], self.tolerance_meters))
+        return [record for i, record in enumerate(segment) if i not in kept]
+
+    def forget(self, device_id: Optional[str] = None) -> None:
+        """Drop the tracking state of one device, or of every device."""
+        with self._lock:
+            if device_id is None:
+                self._tracks.clear()
+            else:
+                self._tracks.pop(device_id, None)
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+from tracking.infrastructure.httpClient import BACKEND_ERRORS, BACKEND_REQUEST_SECONDS, BackendNotFoundError
+from tracking.infrastructure.resilience import CircuitBreaker, CircuitOpenError
+
+
+class AsyncBackendHttpClient:
+    """
+    asyncio counterpart of BackendHttpClient on a pooled aiohttp session.
+
+    Identical GETs issued while one is already in flight await that request instead of
+    sending their own (single-flight), so students sharing a driver or a trip cost one call
+    per link. The client owns an event loop running on a daemon thread; run() executes a
+    coroutine on it from synchronous code. aiohttp is only imported once the client is used.
+    """
+
+    def __init__(self, base_url: str, jwt_token: str = None, connect_timeout: float = 3.05,
+                 read_timeout: float = 10.0, pool_size: int = 20,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        self.base_url = base_url.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.jwt_token = jwt_token or os.getenv('JWT_TOKEN')
+
+        if not self.jwt_token:
+            raise ValueError("JWT token is required. Set JWT_TOKEN environment variable or pass it directly.")
+
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._session = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+        self.coalesced = 0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="backend-async-client", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coroutine: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the client's event loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop()).result(timeout)
+
+    def _get_session(self):
+        if self._session is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise ValueError("The async backend client requires aiohttp (pip install aiohttp)")
+
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout),
+                headers={
+                    'Authorization': f'Bearer {self.jwt_token}',
+                    'Content-Type': 'application/json'
+                }
+            )
+        return self._session
+
+    async def _send(self, method: str, endpoint: str, path: str, failure_message: str, log_message: str,
+                    json: Optional[Dict[str, Any]] = None) -> Any:
+        if not self.circuit_breaker.allow_request():
+            BACKEND_ERRORS.inc(endpoint, "circuit_open")
+            raise CircuitOpenError(f"{failure_message}: backend circuit is open")
+
+        session = self._get_session()
+        import aiohttp
+        url = f"{self.base_url}{path}"
+        self.requests_sent += 1
+        started = time.perf_counter()
+        try:
+            async with session.request(method, url, json=json) as response:
+                if response.status < 400:
+                    body = await response.json(content_type=None)
+                    self.circuit_breaker.record_success()
+                    return body
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            BACKEND_ERRORS.inc(endpoint, "timeout" if isinstance(e, asyncio.TimeoutError) else "connection")
+            self.circuit_breaker.record_failure()
+            logging.error(f"{log_message}: {e!r}")
+            raise ValueError(f"{failure_message}: {e!r}")
+        finally:
+            # Observed directly: the Server-Timing collector belongs to the calling request, not this loop
+            BACKEND_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint)
+
+        BACKEND_ERRORS.inc(endpoint, str(status))
+        message = f"{failure_message}: {status} Error for url: {url}"
+        logging.error(f"{log_message}: {status} Error for url: {url}")
+        if status >= 500 or status == 429:
+            self.circuit_breaker.record_failure()
+            raise ValueError(message)
+        self.circuit_breaker.record_success()
+        if status == 404:
+            raise BackendNotFoundError(message)
+        raise ValueError(message)
+
+    async def _get(self, endpoint: str, path: str, failure_message: str, log_message: str) -> Any:
+        """GET with single-flight: concurrent callers for the same path share one request."""
+        future = self._in_flight.get(path)
+        if future is not None:
+            self.coalesced += 1
+            # Shielded so a cancelled waiter does not cancel the request for everyone else
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[path] = future
+        try:
+            result = await self._send('GET', endpoint, path, failure_message, log_message)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._in_flight[path]
+
+    async def get_wristband_by_rfid(self, rfid_code: str) -> Dict[str, Any]:
+        """Get wristband data by RFID code."""
+        return await self._get('wristband', f"/api/v1/wristbands/rfid/{rfid_code}",
+                               "Wristband request failed", "Failed to get wristband data")
+
+    async def get_student_by_id(self, student_id: int) -> Dict[str, Any]:
+        """Get student data by ID."""
+        return await self._get('student', f"/api/v1/students/{student_id}",
+                               "Student request failed", "Failed to get student data")
+
+    async def get_active_trips_by_driver(self, driver_id: int) -> list[Dict[str, Any]]:
+        """Get active trips for a driver."""
+        return await self._get('active_trips', f"/api/v1/trips/active/driver/{driver_id}",
+                               "Active trips request failed", "Failed to get active trips")
+
+    async def get_trip_by_id(self, trip_id: int) -> Dict[str, Any]:
+        """Get trip data by ID."""
+        return await self._get('trip', f"/api/v1/trips/{trip_id}",
+                               "Trip request failed", "Failed to get trip data")
+
+    async def post_tracking_to_backend(self, tracking_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Post tracking record to backend."""
+        return await self._send('POST', 'locations', "/api/v1/locations", "Backend tracking post failed",
+                                "Failed to post tracking to backend", json=tracking_data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests_sent": self.requests_sent,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            **self.circuit_breaker.stats()
+        }
+
+    async def _close_session(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def close(self) -> None:
+        """Close the session and stop the event loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._close_session(), loop).result(5)
+            loop.call_soon_threadsafe(loop.stop)
@@ -0,0 +1,244 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional
+
+
+class _NegativeResult:
+    """Cached marker for a lookup that failed with an expected 'not found' style error."""
+
+    __slots__ = ("error_type", "message")
+
+    def __init__(self, error: Exception):
+        self.error_type = type(error)
+        self.message = str(error)
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a time-to-live.
+
+    Negative results (loader errors listed in negative_errors, or values flagged by
+    is_negative) are kept for negative_ttl seconds, usually much shorter than ttl.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0, negative_ttl: float = 30.0,
+                 negative_errors: tuple = ()):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.negative_errors = negative_errors
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """Return (found, value) and refresh the entry's LRU position."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def peek(self, key: Hashable) -> tuple[bool, Any]:
+        """Return (found, value) without counting a hit or miss; cached negative results count as missing."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic() or isinstance(entry[1], _NegativeResult):
+            return False, None
+        return True, entry[1]
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _lookup(self, key: Hashable) -> tuple[bool, Any]:
+        """Like get(), but re-raises a cached negative result."""
+        found, value = self.get(key)
+        if found and isinstance(value, _NegativeResult):
+            raise value.error_type(value.message)
+        return found, value
+
+    def _store_loaded(self, key: Hashable, value: Any, is_negative: Optional[Callable[[Any], bool]]) -> None:
+        negative = is_negative is not None and is_negative(value)
+        self.put(key, value, self.negative_ttl if negative else None)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[Hashable], Any],
+                    is_negative: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return the cached value for key, calling loader on a miss and caching its outcome."""
+        found, value = self._lookup(key)
+        if found:
+            return value
+
+        try:
+            value = loader(key)
+        except self.negative_errors as e:
+            self.put(key, _NegativeResult(e), self.negative_ttl)
+            raise
+
+        self._store_loaded(key, value, is_negative)
+        return value
+
+    async def get_or_load_async(self, key: Hashable, loader: Callable[[Hashable], Awaitable[Any]],
+                                is_negative: Optional[Callable[[Any], bool]] = None) -> Any:
+        """get_or_load() for a coroutine loader."""
+        found, value = self._lookup(key)
+        if found:
+            return value
+
+        try:
+            value = await loader(key)
+        except self.negative_errors as e:
+            self.put(key, _NegativeResult(e), self.negative_ttl)
+            raise
+
+        self._store_loaded(key, value, is_negative)
+        return value
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """Drop one entry, or every entry when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+class TripResolutionCache:
+    """
+    Caches each link of the RFID -> wristband -> student -> active trips -> trip chain separately,
+    so students that share a driver or trip also share those lookups.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0, negative_ttl: float = 30.0,
+                 negative_errors: tuple = ()):
+        self.wristbands = TTLCache(max_size, ttl, negative_ttl, negative_errors)
+        self.students = TTLCache(max_size, ttl, negative_ttl, negative_errors)
+        self.active_trips = TTLCache(max_size, ttl, negative_ttl, negative_errors)
+        self.trips = TTLCache(max_size, ttl, negative_ttl, negative_errors)
+
+    def invalidate(self, rfid_code: str = None, student_id: int = None, driver_id: int = None,
+                   trip_id: int = None) -> None:
+        """Drop the given links, or the whole chain when nothing is specified."""
+        if rfid_code is None and student_id is None and driver_id is None and trip_id is None:
+            for cache in (self.wristbands, self.students, self.active_trips, self.trips):
+                cache.invalidate()
+            return
+
+        if rfid_code is not None:
+            self.wristbands.invalidate(rfid_code)
+        if student_id is not None:
+            self.students.invalidate(student_id)
+        if driver_id is not None:
+            self.active_trips.invalidate(driver_id)
+        if trip_id is not None:
+            self.trips.invalidate(trip_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "wristbands": self.wristbands.stats(),
+            "students": self.students.stats(),
+            "active_trips": self.active_trips.stats(),
+            "trips": self.trips.stats()
+        }
+
+
+class LatestPositionStore:
+    """In-memory map of device id -> most recent tracking record, read by the latest-position endpoint."""
+
+    def __init__(self):
+        self._positions: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    @staticmethod
+    def _sort_key(record) -> datetime:
+        created_at = record.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return created_at
+
+    def update(self, records: Iterable[Any]) -> None:
+        """Keep each record that is newer than the device's current position."""
+        with self._lock:
+            for record in records:
+                current = self._positions.get(record.device_id)
+                if current is None or self._sort_key(record) >= self._sort_key(current):
+                    self._positions[record.device_id] = record
+
+    def load(self, records: Iterable[Any]) -> None:
+        """Merge positions read from storage; newer in-memory positions win."""
+        self.update(records)
+        self.loaded = True
+
+    def get(self, device_ids: Optional[Iterable[str]] = None) -> list:
+        with self._lock:
+            if device_ids is None:
+                return list(self._positions.values())
+            return [self._positions[device_id] for device_id in device_ids if device_id in self._positions]
+
+
+class RecentKeySet:
+    """
+    Bounded LRU set of recently stored ping keys, so retried pings are turned away before
+    reaching the write path. Keys evicted from it are still caught by the unique indexes.
+    """
+
+    def __init__(self, max_size: int = 50000):
+        self.max_size = max_size
+        self._keys: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def seen(self, key: Hashable) -> bool:
+        """Whether key was added recently; a hit refreshes its LRU position."""
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            for key in keys:
+                self._keys[key] = None
+                self._keys.move_to_end(key)
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._keys),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
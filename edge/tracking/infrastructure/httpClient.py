@@ -1,19 +1,95 @@
-import requests
 from typing import Dict, Any, Optional
 import logging
 import os
+import threading
+import time
+
+from tracking.infrastructure.resilience import CircuitBreaker, CircuitOpenError, RetryBudget
+from shared.infrastructure.metrics import registry
+
+BACKEND_REQUEST_SECONDS = registry.histogram(
+    "edge_backend_request_seconds", "Duration of backend HTTP requests, retries included", ("endpoint",),
+    timing_prefix="backend."
+)
+BACKEND_ERRORS = registry.counter("edge_backend_errors_total", "Failed backend HTTP requests", ("endpoint", "reason"))
+
+
+class BackendNotFoundError(ValueError):
+    """Raised when the backend answers 404 for the requested resource."""
+
+
+def request_failure(message: str, error: Exception) -> ValueError:
+    """Build the error raised for a failed backend request, keeping 404s distinguishable."""
+    response = getattr(error, 'response', None)
+    if response is not None and response.status_code == 404:
+        return BackendNotFoundError(f"{message}: {str(error)}")
+    return ValueError(f"{message}: {str(error)}")
+
+
+def error_reason(error: Exception) -> str:
+    """Short label for a failed request: timeout, connection or the HTTP status code."""
+    import requests
+    response = getattr(error, 'response', None)
+    if response is not None:
+        return str(response.status_code)
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    return "connection"
+
+
+def is_backend_failure(error: Exception) -> bool:
+    """Whether the error says the backend is unhealthy (as opposed to rejecting this request)."""
+    response = getattr(error, 'response', None)
+    return response is None or response.status_code >= 500 or response.status_code == 429
 
 class BackendHttpClient:
-    """HTTP client for communicating with deployed backend with JWT authentication."""
+    """
+    HTTP client for communicating with deployed backend with JWT authentication.
+
+    Requests share a keep-alive connection pool of pool_size connections and use separate
+    connect and read timeouts. Connection errors, timeouts and 5xx answers count towards a
+    circuit breaker; while it is open calls fail immediately with CircuitOpenError. Lookups
+    (GET) are retried up to max_retries times, drawing on a retry budget shared by all calls.
+    requests is only imported, and the session built, when the first request is sent.
+    """
     
-    def __init__(self, base_url: str, jwt_token: str = None, timeout: int = 30):
+    def __init__(self, base_url: str, jwt_token: str = None, timeout: int = 30,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 pool_size: int = 10, max_retries: int = 2, retry_backoff: float = 0.1,
+                 circuit_breaker: Optional[CircuitBreaker] = None, retry_budget: Optional[RetryBudget] = None):
         self.base_url = base_url.rstrip('/')
-        self.timeout = timeout
-        self.session = requests.Session()
+        self.timeout = (connect_timeout or timeout, read_timeout or timeout)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.pool_size = pool_size
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.retry_budget = retry_budget or RetryBudget()
         self.jwt_token = jwt_token or os.getenv('JWT_TOKEN')
         
         if not self.jwt_token:
             raise ValueError("JWT token is required. Set JWT_TOKEN environment variable or pass it directly.")
+
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The pooled requests session, created on first use."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    # Retries are handled here so they go through the breaker and the retry budget
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    session.headers.update(self.get_jwt_headers())
+                    session.headers['Connection'] = 'keep-alive'
+                    self._session = session
+        return self._session
     
     def get_jwt_headers(self) -> Dict[str, str]:
         """Get headers with JWT token."""
@@ -21,63 +97,76 @@ class BackendHttpClient:
             'Authorization': f'Bearer {self.jwt_token}',
             'Content-Type': 'application/json'
         }
+
+    def stats(self) -> Dict[str, Any]:
+        """Circuit breaker state and rejection count."""
+        return self.circuit_breaker.stats()
+
+    def _request(self, method: str, endpoint: str, path: str, failure_message: str, log_message: str,
+                 json: Optional[Dict[str, Any]] = None) -> Any:
+        """Send a request through the circuit breaker and time it."""
+        if not self.circuit_breaker.allow_request():
+            BACKEND_ERRORS.inc(endpoint, "circuit_open")
+            raise CircuitOpenError(f"{failure_message}: backend circuit is open")
+
+        with BACKEND_REQUEST_SECONDS.time(endpoint):
+            return self._send(method, endpoint, path, failure_message, log_message, json)
+
+    def _send(self, method: str, endpoint: str, path: str, failure_message: str, log_message: str,
+              json: Optional[Dict[str, Any]]) -> Any:
+        """Send the request, retrying GETs within the retry budget."""
+        import requests
+        url = f"{self.base_url}{path}"
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, json=json, timeout=self.timeout)
+                response.raise_for_status()
+                self.circuit_breaker.record_success()
+                return response.json()
+            except requests.exceptions.RequestException as e:
+                BACKEND_ERRORS.inc(endpoint, error_reason(e))
+                if not is_backend_failure(e):
+                    # The backend answered; the request itself was rejected
+                    self.circuit_breaker.record_success()
+                    logging.error(f"{log_message}: {e}")
+                    raise request_failure(failure_message, e)
+
+                self.circuit_breaker.record_failure()
+                # POSTs are not retried: the backend may have stored the location already
+                retryable = method == 'GET' or isinstance(e, requests.exceptions.ConnectionError)
+                if (attempt < self.max_retries and retryable and self.circuit_breaker.allow_request()
+                        and self.retry_budget.try_spend()):
+                    attempt += 1
+                    time.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+                    continue
+
+                logging.error(f"{log_message}: {e}")
+                raise request_failure(failure_message, e)
         
     def get_wristband_by_rfid(self, rfid_code: str) -> Dict[str, Any]:
         """Get wristband data by RFID code."""
-        try:
-            url = f"{self.base_url}/api/v1/wristbands/rfid/{rfid_code}"
-            headers = self.get_jwt_headers()
-            response = self.session.get(url, headers=headers, timeout=self.timeout)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to get wristband data: {e}")
-            raise ValueError(f"Wristband request failed: {str(e)}")
+        return self._request('GET', 'wristband', f"/api/v1/wristbands/rfid/{rfid_code}",
+                             "Wristband request failed", "Failed to get wristband data")
     
     def get_student_by_id(self, student_id: int) -> Dict[str, Any]:
         """Get student data by ID."""
-        try:
-            url = f"{self.base_url}/api/v1/students/{student_id}"
-            headers = self.get_jwt_headers()
-            response = self.session.get(url, headers=headers, timeout=self.timeout)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to get student data: {e}")
-            raise ValueError(f"Student request failed: {str(e)}")
+        return self._request('GET', 'student', f"/api/v1/students/{student_id}",
+                             "Student request failed", "Failed to get student data")
     
     def get_active_trips_by_driver(self, driver_id: int) -> list[Dict[str, Any]]:
         """Get active trips for a driver."""
-        try:
-            url = f"{self.base_url}/api/v1/trips/active/driver/{driver_id}"
-            headers = self.get_jwt_headers()
-            response = self.session.get(url, headers=headers, timeout=self.timeout)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to get active trips: {e}")
-            raise ValueError(f"Active trips request failed: {str(e)}")
+        return self._request('GET', 'active_trips', f"/api/v1/trips/active/driver/{driver_id}",
+                             "Active trips request failed", "Failed to get active trips")
     
     def get_trip_by_id(self, trip_id: int) -> Dict[str, Any]:
         """Get trip data by ID."""
-        try:
-            url = f"{self.base_url}/api/v1/trips/{trip_id}"
-            headers = self.get_jwt_headers()
-            response = self.session.get(url, headers=headers, timeout=self.timeout)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to get trip data: {e}")
-            raise ValueError(f"Trip request failed: {str(e)}")
+        return self._request('GET', 'trip', f"/api/v1/trips/{trip_id}",
+                             "Trip request failed", "Failed to get trip data")
     
     def post_tracking_to_backend(self, tracking_data: Dict[str, Any]) -> Dict[str, Any]:
         """Post tracking record to backend."""
-        try:
-            url = f"{self.base_url}/api/v1/locations"
-            headers = self.get_jwt_headers()
-            response = self.session.post(url, json=tracking_data, headers=headers, timeout=self.timeout)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to post tracking to backend: {e}")
-            raise ValueError(f"Backend tracking post failed: {str(e)}")
\ No newline at end of file
+        return self._request('POST', 'locations', "/api/v1/locations",
+                             "Backend tracking post failed", "Failed to post tracking to backend",
+                             json=tracking_data)
\ No newline at end of file
@@ -1,14 +1,119 @@
-from peewee import Model, AutoField, CharField, FloatField, DateTimeField
+from peewee import Model, AutoField, CharField, FloatField, DateTimeField, IntegerField, TextField, DateField, CompositeKey
+from playhouse.sqlite_ext import AutoIncrementField
 from shared.infrastructure.database import db
+from datetime import datetime
 
 class TrackingRecord(Model):
-    id = AutoField()
+    # Never reuses the ids of records sealed into partitions (see schema.upgrade_record_ids)
+    id = AutoIncrementField()
     device_id = CharField()
     latitude = FloatField()
     longitude = FloatField()
     speed = FloatField()
     created_at = DateTimeField()
+    message_id = CharField(null=True)
 
     class Meta:
         database = db
         table_name = "tracking_records"
+        # Range scans of one device's history
+        indexes = (
+            (("device_id", "created_at"), False),
+        )
+
+# Unique, so a ping retried by a reader is stored once (see schema.upgrade_dedup_keys). Like
+# TrackingRecordService.idempotency_key, pings with a message id are keyed by it and the
+# others by their time, so distinct pings sent in the same second are both kept
+TrackingRecord.add_index(TrackingRecord.index(
+    TrackingRecord.device_id, TrackingRecord.created_at, unique=True, where=TrackingRecord.message_id.is_null(),
+    name="trackingrecord_device_id_created_at_key"
+))
+TrackingRecord.add_index(TrackingRecord.index(
+    TrackingRecord.device_id, TrackingRecord.message_id, unique=True, where=TrackingRecord.message_id.is_null(False)
+))
+
+class TrackingRecordView(TrackingRecord):
+    """
+    Read-only view over tracking_records and its sealed partitions (see schema.create_read_view).
+    Every read of the tracking history goes through it; writes go to TrackingRecord.
+    """
+
+    class Meta:
+        table_name = "tracking_records_all"
+
+class MinuteRollup(Model):
+    """Per-device, per-minute sums of the tracking records, kept after the raw records are dropped."""
+    device_id = CharField()
+    minute = DateTimeField()  # start of the minute, UTC
+    points = IntegerField()
+    latitude_sum = FloatField()
+    longitude_sum = FloatField()
+    speed_sum = FloatField()
+    max_speed = FloatField()
+
+    class Meta:
+        database = db
+        table_name = "tracking_rollup_minutes"
+        primary_key = CompositeKey("device_id", "minute")
+        indexes = (
+            (("minute",), False),
+        )
+
+class DailyRollup(Model):
+    """Per-device, per-day totals of the tracking records, including the distance travelled."""
+    device_id = CharField()
+    day = DateField()  # UTC
+    points = IntegerField()
+    distance_meters = FloatField()
+    max_speed = FloatField()
+    first_at = DateTimeField()
+    last_at = DateTimeField()
+    # Last fix rolled up, so the distance continues across rollup batches
+    last_latitude = FloatField()
+    last_longitude = FloatField()
+
+    class Meta:
+        database = db
+        table_name = "tracking_rollup_days"
+        primary_key = CompositeKey("device_id", "day")
+
+class LatestPosition(Model):
+    """Most recent fix of each device, upserted by the ingest path."""
+    device_id = CharField(primary_key=True)
+    tracking_record_id = IntegerField()
+    latitude = FloatField()
+    longitude = FloatField()
+    speed = FloatField()
+    created_at = DateTimeField()
+
+    class Meta:
+        database = db
+        table_name = "tracking_latest_positions"
+
+class OutboxEntry(Model):
+    """
+    Tracking record waiting to be forwarded to the backend. Written in the same transaction
+    as the local record and drained by the background forwarder. trip_id and vehicle_id are
+    filled in at ingest when the trip chain is cached, otherwise resolved at delivery.
+    """
+    id = AutoField()
+    tracking_record_id = IntegerField(null=True)
+    device_id = CharField()
+    latitude = FloatField()
+    longitude = FloatField()
+    speed = FloatField()
+    timestamp = CharField()  # ISO 8601 UTC, as sent to the backend
+    trip_id = IntegerField(null=True)
+    vehicle_id = IntegerField(null=True)
+    status = CharField(default="pending")  # pending | in_flight | delivered | failed | no_trip
+    attempts = IntegerField(default=0)
+    next_attempt_at = DateTimeField(default=datetime.utcnow)
+    last_error = TextField(null=True)
+    delivered_at = DateTimeField(null=True)
+
+    class Meta:
+        database = db
+        table_name = "tracking_outbox"
+        indexes = (
+            (("status", "next_attempt_at"), False),
+        )
@@ -0,0 +1,95 @@
+import threading
+from collections import deque
+from typing import Any, Iterable, Optional
+
+
+class SubscriberLimitError(ValueError):
+    """Raised when the hub already serves its maximum number of subscribers."""
+
+
+class Subscription:
+    """
+    One subscriber's bounded queue of tracking records. When the queue is full the oldest
+    record is dropped, so a slow reader loses history instead of holding up publishers.
+    """
+
+    def __init__(self, hub: "LocationUpdateHub", device_ids: Optional[frozenset], max_queue_size: int):
+        self.hub = hub
+        self.device_ids = device_ids
+        self._queue: deque = deque(maxlen=max_queue_size)
+        self._ready = threading.Condition(threading.Lock())
+        self.closed = False
+        self.dropped = 0
+
+    def _offer(self, records: list) -> int:
+        """Queue records and return how many (older) records the bound pushed out."""
+        with self._ready:
+            dropped = max(0, len(self._queue) + len(records) - self._queue.maxlen)
+            self.dropped += dropped
+            self._queue.extend(records)
+            self._ready.notify()
+        return dropped
+
+    def get(self, timeout: float) -> list:
+        """Wait up to timeout seconds for records and return all queued ones (empty on timeout)."""
+        with self._ready:
+            if not self._queue and not self.closed:
+                self._ready.wait(timeout)
+            records = list(self._queue)
+            self._queue.clear()
+            return records
+
+    def close(self) -> None:
+        """Unsubscribe and wake a reader blocked in get()."""
+        self.hub.unsubscribe(self)
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+
+class LocationUpdateHub:
+    """
+    In-process fan-out of newly stored tracking records to live subscribers (the SSE stream).
+    publish() only appends to in-memory queues, so it is cheap to call on the ingest path and
+    costs nothing while nobody is subscribed.
+    """
+
+    def __init__(self, max_subscribers: int = 100, max_queue_size: int = 256):
+        self.max_subscribers = max_subscribers
+        self.max_queue_size = max_queue_size
+        self._subscriptions: list[Subscription] = []
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, device_ids: Optional[Iterable[str]] = None) -> Subscription:
+        """Subscribe to every device, or only to device_ids; raises SubscriberLimitError when full."""
+        subscription = Subscription(self, frozenset(device_ids) if device_ids else None, self.max_queue_size)
+        with self._lock:
+            if len(self._subscriptions) >= self.max_subscribers:
+                raise SubscriberLimitError("Too many live subscribers")
+            # Copy on write, so publish() iterates a snapshot without holding the lock
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions = [current for current in self._subscriptions if current is not subscription]
+
+    def publish(self, records: Iterable[Any]) -> None:
+        """Hand records to every subscriber whose device filter matches them."""
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        records = list(records)
+        self.published += len(records)
+        for subscription in subscriptions:
+            if subscription.device_ids is None:
+                matching = records
+            else:
+                matching = [record for record in records if record.device_id in subscription.device_ids]
+            if matching:
+                self.dropped += subscription._offer(matching)
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
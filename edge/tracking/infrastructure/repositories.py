@@ -1,61 +1,815 @@
-from tracking.infrastructure.models import TrackingRecord as TrackingRecordModel
-from tracking.domain.entities import TrackingRecord
-from datetime import datetime
+from tracking.infrastructure.models import (TrackingRecord as TrackingRecordModel, TrackingRecordView, OutboxEntry,
+                                            LatestPosition, MinuteRollup, DailyRollup)
+from tracking.domain.entities import TrackingRecord, MinuteSummary, DailySummary
+from tracking.infrastructure.write_buffer import TrackingWriteBuffer
+from tracking.infrastructure.cache import LatestPositionStore
+from tracking.infrastructure.pubsub import LocationUpdateHub
+from tracking.infrastructure.schema import (READ_VIEW, RECORDS_TABLE, RECORD_TABLE_COLUMNS, copy_to_spatial_index,
+                                            create_partition, drop_partition, list_partitions, partition_bounds,
+                                            partition_name, record_tables, spatial_index_of, to_index_time)
+from tracking.domain.services import DuplicateRecordError, bounding_box, haversine_meters
+from shared.infrastructure.database import db
+from shared.infrastructure.metrics import registry
+from peewee import EXCLUDED, SQL, fn, Tuple
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence
+from array import array
+import base64
+
+# Rows per multi-row INSERT, kept well below SQLite's bound-variable limit
+BULK_INSERT_CHUNK_SIZE = 500
+
+REPOSITORY_SECONDS = registry.histogram(
+    "edge_repository_seconds", "Duration of tracking repository operations", ("operation",), timing_prefix="db."
+)
+ROWS_WRITTEN = registry.counter("edge_rows_written_total", "Rows inserted by the tracking repositories", ("table",))
+DUPLICATES = registry.counter(
+    "edge_tracking_duplicates_total", "Duplicate pings rejected by the recent-key set or the unique indexes", ("check",)
+)
+
+def encode_cursor(record_id: int, created_at) -> str:
+    """Opaque page cursor holding the id and the stored created_at text of the last row."""
+    return base64.urlsafe_b64encode(f"{record_id}|{created_at}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[int, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        record_id, created_at = raw.split("|", 1)
+        return int(record_id), created_at
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def parse_created_at(created_at):
+    """Stored timestamps carry a UTC offset peewee does not parse, so they come back as text."""
+    if isinstance(created_at, str):
+        if created_at.endswith("Z"):
+            created_at = created_at[:-1]
+        created_at = datetime.fromisoformat(created_at)
+    return created_at
+
+# Columns read for tracking records, in TrackingRecord constructor order
+RECORD_COLUMNS = (
+    TrackingRecordView.device_id,
+    TrackingRecordView.latitude,
+    TrackingRecordView.longitude,
+    TrackingRecordView.speed,
+    TrackingRecordView.created_at,
+    TrackingRecordView.id
+)
+RECORD_SQL_COLUMNS = "t.device_id, t.latitude, t.longitude, t.speed, t.created_at, t.id"
+
+def hydrate_records(rows: Iterable[tuple]) -> list[TrackingRecord]:
+    """
+    Build entities straight from raw cursor tuples in RECORD_COLUMNS order, skipping peewee
+    model instances; created_at is the only value decoded.
+    """
+    return [
+        TrackingRecord(device_id, latitude, longitude, speed, parse_created_at(created_at), record_id)
+        for device_id, latitude, longitude, speed, created_at, record_id in rows
+    ]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+def epoch_microseconds(created_at: datetime) -> int:
+    """Exact microseconds since the Unix epoch; naive values are taken as UTC."""
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return (created_at - _EPOCH) // _MICROSECOND
 
 class TrackingRecordRepository:
-    """Repository for managing persistence of tracking records."""
+    """
+    Repository for managing persistence of tracking records.
+
+    With a write buffer, save() queues the record for a group commit and returns it
+    without an id; the id is filled in once the background flush has committed it.
+
+    Records saved with forward=True also get an outbox entry in the same transaction,
+    which the backend forwarder delivers later; trip_lookup, when given, supplies the
+    cached trip stored with it (see OutboxRepository.enqueue). Every write also upserts the devices'
+    latest positions, mirrored in memory once the transaction has committed.
+
+    Writes go to the live tracking_records table; reads go through the view that also
+    covers the sealed partitions (see PartitionRepository).
+    """
+
+    # Shared by every instance, like the database connection itself
+    latest_positions = LatestPositionStore()
+    # Live subscribers (the SSE stream) are handed every record once it is committed
+    updates = LocationUpdateHub()
+
+    def __init__(self, write_buffer: TrackingWriteBuffer = None,
+                 trip_lookup: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None):
+        self.write_buffer = write_buffer
+        self.trip_lookup = trip_lookup
+
+    def save(self, record: TrackingRecord, forward: bool = False) -> TrackingRecord:
+        """Store one record; raises DuplicateRecordError when the same ping is already stored."""
+        if self.write_buffer is not None:
+            return self.write_buffer.put(record, forward)
+
+        saved = self.save_many([record], forward)[0]
+        if saved is None:
+            raise DuplicateRecordError("Tracking record already stored")
+        return saved
+
+    @REPOSITORY_SECONDS.timed("save_many")
+    def save_many(self, records: list[TrackingRecord],
+                  forward: bool | Sequence[bool] = False) -> list[Optional[TrackingRecord]]:
+        """
+        Persist several records with chunked multi-row inserts inside a single transaction.
+        forward is either one flag for the whole batch or one flag per record.
+        Returns one entry per given record, in order: the record with its generated id set, or
+        None when the unique indexes rejected it as a duplicate of a stored (or earlier) ping.
+        """
+        flags = [forward] * len(records) if isinstance(forward, bool) else list(forward)
+        result: list[Optional[TrackingRecord]] = []
+        saved = []
+        # IMMEDIATE takes the write lock up front: a deferred transaction that the R*Tree
+        # trigger has already made a reader fails with "database is locked" under concurrent writers
+        with db.atomic("IMMEDIATE"):
+            for start in range(0, len(records), BULK_INSERT_CHUNK_SIZE):
+                chunk = records[start:start + BULK_INSERT_CHUNK_SIZE]
+                chunk_flags = flags[start:start + BULK_INSERT_CHUNK_SIZE]
+                rows = [
+                    {
+                        "device_id": record.device_id,
+                        "latitude": record.latitude,
+                        "longitude": record.longitude,
+                        "speed": record.speed,
+                        "created_at": record.created_at,
+                        "message_id": record.message_id
+                    }
+                    for record in chunk
+                ]
+                query = TrackingRecordModel.insert_many(rows).on_conflict_ignore().returning(
+                    TrackingRecordModel.id, TrackingRecordModel.device_id, TrackingRecordModel.created_at,
+                    TrackingRecordModel.message_id
+                )
+                # Ignored rows return nothing, so inserted ids are matched back by key; created_at
+                # comes back as the text SQLite stored, which is str() of the bound datetime
+                ids = {
+                    (device_id, created_at, message_id): record_id
+                    for record_id, device_id, created_at, message_id in db.execute(query).fetchall()
+                }
+                forwarded = []
+                for record, flag in zip(chunk, chunk_flags):
+                    record_id = ids.pop((record.device_id, str(record.created_at), record.message_id), None)
+                    if record_id is None:
+                        result.append(None)
+                        continue
+                    record.id = record_id
+                    saved.append(record)
+                    result.append(record)
+                    if flag:
+                        forwarded.append(record)
+                if forwarded:
+                    OutboxRepository.enqueue(forwarded, [record.id for record in forwarded], self.trip_lookup)
+            LatestPositionRepository.upsert(saved)
+        ROWS_WRITTEN.inc("tracking_records", amount=len(saved))
+        DUPLICATES.inc("database", amount=len(records) - len(saved))
+        TrackingRecordRepository.latest_positions.update(saved)
+        TrackingRecordRepository.updates.publish(saved)
+        return result
 
     @staticmethod
-    def save(record: TrackingRecord) -> TrackingRecord:
-        row = TrackingRecordModel.create(
-            device_id=record.device_id,
-            latitude=record.latitude,
-            longitude=record.longitude,
-            speed = record.speed,
-            created_at=record.created_at
-        )
-        return TrackingRecord(
-            row.device_id,
-            row.latitude,
-            row.longitude,
-            row.speed,
-            row.created_at,
-            row.id
-        )
-    
+    @REPOSITORY_SECONDS.timed("delete_many")
+    def delete_many(record_ids: list[int]) -> None:
+        """
+        Delete records and their undelivered outbox entries in one transaction. Only the live table
+        is searched: trajectory compaction deletes recent records, long before they are sealed.
+        """
+        with db.atomic("IMMEDIATE"):
+            for start in range(0, len(record_ids), BULK_INSERT_CHUNK_SIZE):
+                chunk = record_ids[start:start + BULK_INSERT_CHUNK_SIZE]
+                OutboxEntry.delete().where(
+                    (OutboxEntry.tracking_record_id.in_(chunk)) & (OutboxEntry.status == "pending")
+                ).execute()
+                TrackingRecordModel.delete().where(TrackingRecordModel.id.in_(chunk)).execute()
+
     @staticmethod
+    @REPOSITORY_SECONDS.timed("get_all")
     def get_all() -> list[TrackingRecord]:
-        locations = TrackingRecordModel.select()
-        result = []
-        for loc in locations:
-            created_at = loc.created_at
-            if isinstance(created_at, str):
-                created_at = datetime.fromisoformat(created_at.replace("Z", ""))
-            result.append(TrackingRecord(
-                loc.device_id,
-                loc.latitude,
-                loc.longitude,
-                loc.speed,
-                created_at,
-                loc.id
-            ))
-        return result
+        return hydrate_records(db.execute(TrackingRecordView.select(*RECORD_COLUMNS)))
     
     @staticmethod
+    @REPOSITORY_SECONDS.timed("get_by_device_id")
     def get_by_device_id(device_id: str) -> list[TrackingRecord]:
         """Get tracking records for a specific device."""
-        locations = TrackingRecordModel.select().where(TrackingRecordModel.device_id == device_id)
-        result = []
-        for loc in locations:
-            created_at = loc.created_at
-            if isinstance(created_at, str):
-                created_at = datetime.fromisoformat(created_at.replace("Z", ""))
-            result.append(TrackingRecord(
-                loc.device_id,
-                loc.latitude,
-                loc.longitude,
-                loc.speed,
-                created_at,
-                loc.id
-            ))
-        return result
\ No newline at end of file
+        query = TrackingRecordView.select(*RECORD_COLUMNS).where(TrackingRecordView.device_id == device_id)
+        return hydrate_records(db.execute(query))
+
+    @staticmethod
+    def _filter(query, device_id: str = None, since: datetime = None, until: datetime = None):
+        if device_id is not None:
+            query = query.where(TrackingRecordView.device_id == device_id)
+        if since is not None:
+            query = query.where(TrackingRecordView.created_at >= since)
+        if until is not None:
+            query = query.where(TrackingRecordView.created_at < until)
+        return query
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("get_page")
+    def get_page(limit: int, cursor: str = None, device_id: str = None, since: datetime = None,
+                 until: datetime = None) -> tuple[list[TrackingRecord], Optional[str]]:
+        """
+        Keyset-paginated read. Returns up to limit records and the cursor of the next page,
+        or None on the last page.
+
+        Pages for one device follow (created_at, id) so they are served as range scans of the
+        (device_id, created_at) index; unfiltered pages follow the primary key. since is
+        inclusive, until exclusive.
+        """
+        query = TrackingRecordRepository._filter(TrackingRecordView.select(*RECORD_COLUMNS), device_id, since, until)
+
+        after = decode_cursor(cursor) if cursor else None
+        if device_id is not None:
+            if after:
+                query = query.where(
+                    Tuple(TrackingRecordView.created_at, TrackingRecordView.id) > Tuple(after[1], after[0])
+                )
+            query = query.order_by(TrackingRecordView.created_at, TrackingRecordView.id)
+        else:
+            if after:
+                query = query.where(TrackingRecordView.id > after[0])
+            query = query.order_by(TrackingRecordView.id)
+
+        rows = db.execute(query.limit(limit + 1)).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            # Raw rows keep created_at exactly as stored, which the keyset comparison relies on
+            next_cursor = encode_cursor(rows[-1][5], rows[-1][4])
+        return hydrate_records(rows), next_cursor
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("get_columns")
+    def get_columns(device_id: str = None, since: datetime = None, until: datetime = None,
+                    as_numpy: bool = False) -> Any:
+        """
+        Matching records in id order as parallel columns, for analytics over large ranges.
+        Returns a dict of "id" and "device_id" lists and "latitude", "longitude", "speed"
+        (array of doubles) and "created_at" (array of int64 microseconds since the epoch).
+        With as_numpy, a NumPy structured array with created_at as datetime64[us] instead.
+        """
+        query = TrackingRecordRepository._filter(TrackingRecordView.select(*RECORD_COLUMNS), device_id, since, until)
+        columns: Dict[str, Any] = {
+            "id": [], "device_id": [], "latitude": array("d"), "longitude": array("d"),
+            "speed": array("d"), "created_at": array("q")
+        }
+        ids, device_ids = columns["id"], columns["device_id"]
+        latitudes, longitudes, speeds, times = (columns["latitude"], columns["longitude"], columns["speed"],
+                                                columns["created_at"])
+        for device_id_value, latitude, longitude, speed, created_at, record_id in db.execute(
+                query.order_by(TrackingRecordView.id)):
+            ids.append(record_id)
+            device_ids.append(device_id_value)
+            latitudes.append(latitude)
+            longitudes.append(longitude)
+            speeds.append(speed)
+            times.append(epoch_microseconds(parse_created_at(created_at)))
+
+        if not as_numpy:
+            return columns
+
+        try:
+            import numpy
+        except ImportError:
+            raise ValueError("Columnar NumPy results require numpy (pip install numpy)")
+        width = max((len(value) for value in device_ids), default=1)
+        result = numpy.empty(len(ids), dtype=[
+            ("id", "i8"), ("device_id", f"U{width}"), ("latitude", "f8"), ("longitude", "f8"),
+            ("speed", "f8"), ("created_at", "datetime64[us]")
+        ])
+        result["id"] = ids
+        result["device_id"] = device_ids
+        result["latitude"] = numpy.frombuffer(latitudes, dtype="f8")
+        result["longitude"] = numpy.frombuffer(longitudes, dtype="f8")
+        result["speed"] = numpy.frombuffer(speeds, dtype="f8")
+        result["created_at"] = numpy.frombuffer(times, dtype="i8").astype("datetime64[us]")
+        return result
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("get_latest_positions")
+    def get_latest_positions(device_ids: list[str] = None) -> list[TrackingRecord]:
+        """Most recent record of each device (or of the given devices), served from memory."""
+        store = TrackingRecordRepository.latest_positions
+        if not store.loaded:
+            store.load(LatestPositionRepository.get_all())
+        return store.get(device_ids)
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("find_in_area")
+    def find_in_area(min_lat: float, max_lat: float, min_lon: float, max_lon: float, since: datetime = None,
+                     until: datetime = None, limit: int = 1000) -> list[TrackingRecord]:
+        """Records inside a bounding box and optional time window, found through the R*Tree."""
+        sql, params = TrackingRecordRepository._area_query(
+            RECORD_SQL_COLUMNS, (min_lat, max_lat, min_lon, max_lon), since, until
+        )
+        return hydrate_records(db.execute_sql(f"SELECT * FROM ({sql}) ORDER BY id LIMIT ?", params + [limit]))
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("find_devices_in_area")
+    def find_devices_in_area(min_lat: float, max_lat: float, min_lon: float, max_lon: float,
+                             since: datetime = None, until: datetime = None) -> list[str]:
+        """Distinct devices with at least one record inside the box and time window."""
+        sql, params = TrackingRecordRepository._area_query(
+            "DISTINCT t.device_id", (min_lat, max_lat, min_lon, max_lon), since, until, compound="UNION"
+        )
+        return sorted(row[0] for row in db.execute_sql(sql, params))
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("find_near")
+    def find_near(latitude: float, longitude: float, radius_meters: float, since: datetime = None,
+                  until: datetime = None, limit: int = 1000) -> list[tuple[TrackingRecord, float]]:
+        """
+        Records within radius_meters of a point, with their distance. The R*Tree narrows the
+        search to the circle's bounding box and haversine distance refines the candidates.
+        """
+        sql, params = TrackingRecordRepository._area_query(
+            RECORD_SQL_COLUMNS, bounding_box(latitude, longitude, radius_meters), since, until
+        )
+        rows, distances = [], []
+        for row in db.execute_sql(f"SELECT * FROM ({sql}) ORDER BY id", params):
+            distance = haversine_meters(latitude, longitude, row[1], row[2])
+            if distance <= radius_meters:
+                rows.append(row)
+                distances.append(distance)
+                if len(rows) >= limit:
+                    break
+        return list(zip(hydrate_records(rows), distances))
+
+    @staticmethod
+    def _area_query(columns: str, box: tuple[float, float, float, float], since: datetime = None,
+                    until: datetime = None, compound: str = "UNION ALL") -> tuple[str, list]:
+        """
+        SELECT joining each records table with its R*Tree, combined with compound across the live
+        table and the partitions overlapping the time window. R*Tree bounds are rounded outwards,
+        so the exact columns are checked again on the joined rows.
+        """
+        min_lat, max_lat, min_lon, max_lon = box
+        where = [
+            "r.min_lat <= ?", "r.max_lat >= ?", "r.min_lon <= ?", "r.max_lon >= ?",
+            "t.latitude BETWEEN ? AND ?", "t.longitude BETWEEN ? AND ?"
+        ]
+        params = [max_lat, min_lat, max_lon, min_lon, min_lat, max_lat, min_lon, max_lon]
+        if since is not None:
+            where += ["r.max_t >= ?", "t.created_at >= ?"]
+            params += [to_index_time(since.timestamp()) - 1, since]
+        if until is not None:
+            where += ["r.min_t <= ?", "t.created_at < ?"]
+            params += [to_index_time(until.timestamp()) + 1, until]
+
+        selects, all_params = [], []
+        for table in record_tables():
+            if table != RECORDS_TABLE:
+                start, end = partition_bounds(table)
+                if (since is not None and end <= since) or (until is not None and start >= until):
+                    continue
+            selects.append(f'SELECT {columns} FROM "{spatial_index_of(table)}" AS r '
+                           f'JOIN "{table}" AS t ON t.id = r.id WHERE {" AND ".join(where)}')
+            all_params += params
+        return f" {compound} ".join(selects), all_params
+
+    @staticmethod
+    def cursor_after(record_id: int) -> str:
+        """Page cursor that resumes right after the given record id."""
+        row = TrackingRecordView.get_or_none(TrackingRecordView.id == record_id)
+        if row is None:
+            raise ValueError(f"Unknown tracking record id: {record_id}")
+        return encode_cursor(row.id, row.created_at)
+
+    @staticmethod
+    def iter_records(chunk_size: int, cursor: str = None, device_id: str = None, since: datetime = None,
+                     until: datetime = None) -> Iterator[TrackingRecord]:
+        """
+        Lazily yield every matching record in page order, reading chunk_size rows per query.
+        Each chunk is a short keyset query, so a slow consumer never holds a read transaction open.
+        """
+        while True:
+            records, cursor = TrackingRecordRepository.get_page(chunk_size, cursor, device_id, since, until)
+            yield from records
+            if cursor is None:
+                return
+
+class LatestPositionRepository:
+    """Repository for the one-row-per-device table of latest positions."""
+
+    @staticmethod
+    def upsert(records: list[TrackingRecord]) -> None:
+        """Upsert the newest of the given records per device; older fixes never overwrite newer ones."""
+        newest = {}
+        for record in records:
+            current = newest.get(record.device_id)
+            if current is None or record.created_at >= current.created_at:
+                newest[record.device_id] = record
+
+        rows = [
+            {
+                "device_id": record.device_id,
+                "tracking_record_id": record.id,
+                "latitude": record.latitude,
+                "longitude": record.longitude,
+                "speed": record.speed,
+                "created_at": record.created_at
+            }
+            for record in newest.values()
+        ]
+        for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+            LatestPosition.insert_many(rows[start:start + BULK_INSERT_CHUNK_SIZE]).on_conflict(
+                conflict_target=[LatestPosition.device_id],
+                preserve=[
+                    LatestPosition.tracking_record_id,
+                    LatestPosition.latitude,
+                    LatestPosition.longitude,
+                    LatestPosition.speed,
+                    LatestPosition.created_at
+                ],
+                where=(EXCLUDED.created_at >= LatestPosition.created_at)
+            ).execute()
+
+    @staticmethod
+    def get_all() -> list[TrackingRecord]:
+        if not LatestPosition.select().exists():
+            LatestPositionRepository.rebuild()
+        query = LatestPosition.select(
+            LatestPosition.device_id,
+            LatestPosition.latitude,
+            LatestPosition.longitude,
+            LatestPosition.speed,
+            LatestPosition.created_at,
+            LatestPosition.tracking_record_id
+        )
+        return hydrate_records(db.execute(query))
+
+    @staticmethod
+    def rebuild() -> None:
+        """Fill the table from the tracking history, e.g. on a database that predates it."""
+        # SQLite takes the bare columns from the row holding MAX(created_at)
+        db.execute_sql(
+            'INSERT OR REPLACE INTO "tracking_latest_positions" '
+            '("device_id", "tracking_record_id", "latitude", "longitude", "speed", "created_at") '
+            'SELECT "device_id", "id", "latitude", "longitude", "speed", MAX("created_at") '
+            f'FROM "{READ_VIEW}" GROUP BY "device_id"'
+        )
+
+
+class OutboxRepository:
+    """
+    Repository for the outbox of tracking records pending delivery to the backend.
+
+    Entries whose device had no active trip are parked as "no_trip" (and entries out of
+    attempts as "failed") until requeue() hands them back to the forwarder.
+
+    Forwarders claim due entries with a lease (status "in_flight", next_attempt_at holding
+    the lease expiry), so several forwarders never post the same entry at once; entries
+    whose lease ran out, e.g. after a crash, become pending again.
+    """
+
+    @staticmethod
+    def enqueue(records: list[TrackingRecord], record_ids: list[int],
+                trip_lookup: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None) -> None:
+        """
+        Add outbox entries; meant to run inside the transaction that stores the records.
+        trip_lookup maps a device id to its cached {"trip_id", "vehicle_id"} (or None) without
+        calling the backend; the trips it knows are stored with the entries, so the forwarder
+        posts them even if the trip has ended by the time the entry is delivered.
+        """
+        trips: Dict[str, Optional[Dict[str, Any]]] = {}
+        if trip_lookup is not None:
+            for device_id in {record.device_id for record in records}:
+                trips[device_id] = trip_lookup(device_id)
+        rows = []
+        for record, record_id in zip(records, record_ids):
+            trip = trips.get(record.device_id) or {}
+            rows.append({
+                "tracking_record_id": record_id,
+                "device_id": record.device_id,
+                "latitude": record.latitude,
+                "longitude": record.longitude,
+                "speed": record.speed,
+                "timestamp": record.created_at.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                "trip_id": trip.get("trip_id"),
+                "vehicle_id": trip.get("vehicle_id")
+            })
+        for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+            OutboxEntry.insert_many(rows[start:start + BULK_INSERT_CHUNK_SIZE]).execute()
+        ROWS_WRITTEN.inc("tracking_outbox", amount=len(rows))
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("outbox_claim_due")
+    def claim_due(limit: int, lease_seconds: float) -> list[OutboxEntry]:
+        """
+        Claim up to limit pending entries whose next attempt is due, oldest first, for
+        lease_seconds. Claiming runs in one IMMEDIATE transaction, so concurrent forwarders
+        get disjoint entries.
+        """
+        now = datetime.utcnow()
+        with db.atomic("IMMEDIATE"):
+            OutboxEntry.update(status="pending").where(
+                (OutboxEntry.status == "in_flight") & (OutboxEntry.next_attempt_at <= now)
+            ).execute()
+            entries = list(
+                OutboxEntry.select()
+                .where((OutboxEntry.status == "pending") & (OutboxEntry.next_attempt_at <= now))
+                .order_by(OutboxEntry.id)
+                .limit(limit)
+            )
+            if entries:
+                OutboxEntry.update(
+                    status="in_flight", next_attempt_at=now + timedelta(seconds=lease_seconds)
+                ).where(OutboxEntry.id.in_([entry.id for entry in entries])).execute()
+        return entries
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("outbox_release")
+    def release(entry_ids: list[int]) -> None:
+        """Give claimed entries back untouched, due again right away."""
+        if entry_ids:
+            OutboxEntry.update(status="pending", next_attempt_at=datetime.utcnow()) \
+                .where((OutboxEntry.id.in_(entry_ids)) & (OutboxEntry.status == "in_flight")).execute()
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("outbox_mark_delivered")
+    def mark_delivered(entry_ids: list[int]) -> None:
+        if entry_ids:
+            OutboxEntry.update(status="delivered", delivered_at=datetime.utcnow(), last_error=None) \
+                .where(OutboxEntry.id.in_(entry_ids)).execute()
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("outbox_mark_retry")
+    def mark_retry(entry: OutboxEntry, error: str, delay_seconds: float, give_up: bool) -> None:
+        """Record a failed attempt and schedule the next one, or park the entry as failed."""
+        OutboxEntry.update(
+            status="failed" if give_up else "pending",
+            attempts=OutboxEntry.attempts + 1,
+            next_attempt_at=datetime.utcnow() + timedelta(seconds=delay_seconds),
+            last_error=error[:1000]
+        ).where(OutboxEntry.id == entry.id).execute()
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("outbox_mark_no_trip")
+    def mark_no_trip(entry: OutboxEntry, error: str) -> None:
+        """Park an entry whose device has no active trip; it keeps its attempts for a later replay."""
+        OutboxEntry.update(status="no_trip", last_error=error[:1000]).where(OutboxEntry.id == entry.id).execute()
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("outbox_requeue")
+    def requeue(status: str = "no_trip") -> int:
+        """Hand the entries parked with status back to the forwarder, due now; returns how many."""
+        return OutboxEntry.update(
+            status="pending", attempts=0, next_attempt_at=datetime.utcnow()
+        ).where(OutboxEntry.status == status).execute()
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("outbox_purge_delivered")
+    def purge_delivered(older_than: timedelta) -> int:
+        """Delete delivered entries older than the given age."""
+        cutoff = datetime.utcnow() - older_than
+        return OutboxEntry.delete().where(
+            (OutboxEntry.status == "delivered") & (OutboxEntry.delivered_at < cutoff)
+        ).execute()
+
+    @staticmethod
+    def count_by_status() -> dict[str, int]:
+        query = OutboxEntry.select(OutboxEntry.status, fn.COUNT(OutboxEntry.id)).group_by(OutboxEntry.status).tuples()
+        return {status: count for status, count in query}
+
+
+def _as_utc(moment: datetime) -> datetime:
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+class RollupRepository:
+    """Repository for the per-minute and per-day rollups that outlive the raw tracking records."""
+
+    @staticmethod
+    def add(records: list[TrackingRecord]) -> None:
+        """
+        Fold records into the rollups; meant to run inside the transaction that seals them.
+        Minute sums simply add up. The daily distance continues from the last fix already rolled
+        up for that day, so a fix older than it (a late arrival) counts as a point but adds no distance.
+        """
+        minutes: Dict[tuple, dict] = {}
+        days: Dict[tuple, dict] = {}
+        for record in sorted(records, key=lambda record: (record.device_id, _as_utc(record.created_at))):
+            created_at = _as_utc(record.created_at)
+
+            key = (record.device_id, created_at.replace(second=0, microsecond=0))
+            minute = minutes.get(key)
+            if minute is None:
+                minute = minutes[key] = {
+                    "device_id": key[0], "minute": key[1], "points": 0, "latitude_sum": 0.0,
+                    "longitude_sum": 0.0, "speed_sum": 0.0, "max_speed": 0.0
+                }
+            minute["points"] += 1
+            minute["latitude_sum"] += record.latitude
+            minute["longitude_sum"] += record.longitude
+            minute["speed_sum"] += record.speed
+            minute["max_speed"] = max(minute["max_speed"], record.speed)
+
+            key = (record.device_id, created_at.date())
+            if key not in days:
+                days[key] = RollupRepository._get_day(*key)
+            day = days[key]
+            if day is None:
+                days[key] = {
+                    "device_id": key[0], "day": key[1], "points": 1, "distance_meters": 0.0,
+                    "max_speed": record.speed, "first_at": created_at, "last_at": created_at,
+                    "last_latitude": record.latitude, "last_longitude": record.longitude
+                }
+                continue
+            if created_at >= day["last_at"]:
+                day["distance_meters"] += haversine_meters(
+                    day["last_latitude"], day["last_longitude"], record.latitude, record.longitude
+                )
+                day["last_at"] = created_at
+                day["last_latitude"] = record.latitude
+                day["last_longitude"] = record.longitude
+            day["first_at"] = min(day["first_at"], created_at)
+            day["points"] += 1
+            day["max_speed"] = max(day["max_speed"], record.speed)
+
+        minute_rows = list(minutes.values())
+        for start in range(0, len(minute_rows), BULK_INSERT_CHUNK_SIZE):
+            MinuteRollup.insert_many(minute_rows[start:start + BULK_INSERT_CHUNK_SIZE]).on_conflict(
+                conflict_target=[MinuteRollup.device_id, MinuteRollup.minute],
+                update={
+                    MinuteRollup.points: MinuteRollup.points + EXCLUDED.points,
+                    MinuteRollup.latitude_sum: MinuteRollup.latitude_sum + EXCLUDED.latitude_sum,
+                    MinuteRollup.longitude_sum: MinuteRollup.longitude_sum + EXCLUDED.longitude_sum,
+                    MinuteRollup.speed_sum: MinuteRollup.speed_sum + EXCLUDED.speed_sum,
+                    MinuteRollup.max_speed: fn.MAX(MinuteRollup.max_speed, EXCLUDED.max_speed)
+                }
+            ).execute()
+        day_rows = list(days.values())
+        for start in range(0, len(day_rows), BULK_INSERT_CHUNK_SIZE):
+            DailyRollup.insert_many(day_rows[start:start + BULK_INSERT_CHUNK_SIZE]).on_conflict_replace().execute()
+        ROWS_WRITTEN.inc("tracking_rollup_minutes", amount=len(minute_rows))
+        ROWS_WRITTEN.inc("tracking_rollup_days", amount=len(day_rows))
+
+    @staticmethod
+    def _get_day(device_id: str, day) -> Optional[dict]:
+        query = DailyRollup.select(
+            DailyRollup.points, DailyRollup.distance_meters, DailyRollup.max_speed, DailyRollup.first_at,
+            DailyRollup.last_at, DailyRollup.last_latitude, DailyRollup.last_longitude
+        ).where((DailyRollup.device_id == device_id) & (DailyRollup.day == day))
+        row = db.execute(query).fetchone()
+        if row is None:
+            return None
+        points, distance, max_speed, first_at, last_at, last_latitude, last_longitude = row
+        return {
+            "device_id": device_id, "day": day, "points": points, "distance_meters": distance,
+            "max_speed": max_speed, "first_at": _as_utc(parse_created_at(first_at)),
+            "last_at": _as_utc(parse_created_at(last_at)), "last_latitude": last_latitude,
+            "last_longitude": last_longitude
+        }
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("rollup_get_minutes")
+    def get_minutes(device_id: str, since: datetime = None, until: datetime = None,
+                    limit: int = None) -> list[MinuteSummary]:
+        """Minute rollups of a device, oldest first; since is inclusive, until exclusive."""
+        query = MinuteRollup.select(
+            MinuteRollup.device_id, MinuteRollup.minute, MinuteRollup.points, MinuteRollup.latitude_sum,
+            MinuteRollup.longitude_sum, MinuteRollup.speed_sum, MinuteRollup.max_speed
+        ).where(MinuteRollup.device_id == device_id)
+        if since is not None:
+            query = query.where(MinuteRollup.minute >= since.replace(second=0, microsecond=0))
+        if until is not None:
+            query = query.where(MinuteRollup.minute < until)
+        query = query.order_by(MinuteRollup.minute).limit(limit)
+        return [
+            MinuteSummary(device_id_value, parse_created_at(minute), points, latitude_sum / points,
+                          longitude_sum / points, speed_sum / points, max_speed)
+            for device_id_value, minute, points, latitude_sum, longitude_sum, speed_sum, max_speed in db.execute(query)
+        ]
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("rollup_get_days")
+    def get_days(device_id: str, since: datetime = None, until: datetime = None,
+                 limit: int = None) -> list[DailySummary]:
+        """Daily rollups of a device, oldest first, for the days overlapping [since, until)."""
+        query = DailyRollup.select(
+            DailyRollup.device_id, DailyRollup.day, DailyRollup.points, DailyRollup.distance_meters,
+            DailyRollup.max_speed, DailyRollup.first_at, DailyRollup.last_at
+        ).where(DailyRollup.device_id == device_id)
+        if since is not None:
+            query = query.where(DailyRollup.day >= _as_utc(since).date())
+        if until is not None:
+            query = query.where(DailyRollup.day <= (_as_utc(until) - timedelta(microseconds=1)).date())
+        query = query.order_by(DailyRollup.day).limit(limit)
+        return [
+            DailySummary(device_id_value, date.fromisoformat(day), points, distance, max_speed,
+                         parse_created_at(first_at), parse_created_at(last_at))
+            for device_id_value, day, points, distance, max_speed, first_at, last_at in db.execute(query)
+        ]
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("rollup_purge")
+    def purge_before(cutoff: datetime) -> int:
+        """
+        Delete rollups older than cutoff, BULK_INSERT_CHUNK_SIZE rows per transaction so the
+        write lock is only held briefly. Returns the number of rows deleted.
+        """
+        deleted = 0
+        for model, column, bound in ((MinuteRollup, MinuteRollup.minute, cutoff),
+                                     (DailyRollup, DailyRollup.day, _as_utc(cutoff).date())):
+            while True:
+                expired = model.select(SQL("rowid")).where(column < bound).limit(BULK_INSERT_CHUNK_SIZE)
+                count = model.delete().where(SQL("rowid").in_(expired)).execute()
+                deleted += count
+                if count < BULK_INSERT_CHUNK_SIZE:
+                    break
+        return deleted
+
+class PartitionRepository:
+    """
+    Repository moving ended periods of the live tracking table into partitions and dropping
+    expired partitions whole.
+    """
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("partition_seal")
+    def seal(before: datetime, period: str, chunk_size: int = BULK_INSERT_CHUNK_SIZE) -> int:
+        """
+        Move every live record created before the period boundary `before` to the partition of its
+        period, rolling it up on the way. Records are moved per device in time order, chunk_size
+        at a time, each chunk in its own short transaction so ingest keeps writing in between.
+        A record whose key already exists in its partition (a retry arriving late) is dropped.
+        Returns the number of records moved.
+        """
+        devices = [row[0] for row in db.execute_sql(
+            f'SELECT DISTINCT "device_id" FROM "{RECORDS_TABLE}" WHERE "created_at" < ?', (before,)
+        )]
+        partitions = set(list_partitions())
+        moved = 0
+        for device_id in devices:
+            while True:
+                with db.atomic("IMMEDIATE"):
+                    rows = db.execute_sql(
+                        f'SELECT {RECORD_SQL_COLUMNS.replace("t.", "")} FROM "{RECORDS_TABLE}" '
+                        'WHERE "device_id" = ? AND "created_at" < ? ORDER BY "created_at" LIMIT ?',
+                        (device_id, before, chunk_size)
+                    ).fetchall()
+                    if not rows:
+                        break
+
+                    by_partition: Dict[str, list] = {}
+                    for row in rows:
+                        by_partition.setdefault(partition_name(parse_created_at(row[4]), period), []).append(row)
+                    kept = []
+                    for name, group in by_partition.items():
+                        if name not in partitions:
+                            create_partition(name)
+                            partitions.add(name)
+                        record_ids = [row[5] for row in group]
+                        placeholders = ", ".join("?" * len(record_ids))
+                        # RETURNING lists only the rows this statement inserted, not ignored ones
+                        inserted = {row[0] for row in db.execute_sql(
+                            f'INSERT OR IGNORE INTO "{name}" ({RECORD_TABLE_COLUMNS}) '
+                            f'SELECT {RECORD_TABLE_COLUMNS} FROM "{RECORDS_TABLE}" WHERE "id" IN ({placeholders}) '
+                            'RETURNING "id"',
+                            record_ids
+                        ).fetchall()}
+                        if inserted:
+                            copy_to_spatial_index(name, list(inserted))
+                        kept += [row for row in group if row[5] in inserted]
+
+                    RollupRepository.add(hydrate_records(kept))
+                    record_ids = [row[5] for row in rows]
+                    db.execute_sql(
+                        f'DELETE FROM "{RECORDS_TABLE}" WHERE "id" IN ({", ".join("?" * len(record_ids))})', record_ids
+                    )
+                moved += len(kept)
+        return moved
+
+    @staticmethod
+    @REPOSITORY_SECONDS.timed("partition_drop")
+    def drop_ended_before(cutoff: datetime) -> list[str]:
+        """Drop the partitions whose period ended at or before cutoff; returns their names."""
+        dropped = []
+        for name in list_partitions():
+            if partition_bounds(name)[1] <= cutoff:
+                drop_partition(name)
+                dropped.append(name)
+        return dropped
+
+    @staticmethod
+    def count() -> int:
+        """Number of partitions; reads only the schema, unlike stats()."""
+        return len(list_partitions())
+
+    @staticmethod
+    def stats() -> list[Dict[str, Any]]:
+        """Records held by the live table and by each partition, newest partition first (counts every row)."""
+        tables = []
+        for name in [RECORDS_TABLE] + list_partitions()[::-1]:
+            start, end = partition_bounds(name) if name != RECORDS_TABLE else (None, None)
+            tables.append({
+                "table": name,
+                "start": start.isoformat() if start else None,
+                "end": end.isoformat() if end else None,
+                "records": db.execute_sql(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+            })
+        return tables
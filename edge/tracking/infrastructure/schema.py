@@ -0,0 +1,296 @@
+"""
+SQLite schema objects for tracking that peewee models cannot express.
+
+tracking_records_rtree is an R*Tree over (latitude, longitude, time) kept in sync with
+tracking_records by triggers, so every write path (single, bulk, write-behind) indexes rows.
+
+The unique indexes over (device_id, message_id) and, for pings without a message id,
+(device_id, created_at), declared on the model, make the table the authoritative duplicate
+check of idempotent ingest; upgrade_dedup_keys() migrates databases created before them.
+
+Ingest always writes to tracking_records. Once a day or ISO week has passed, maintenance moves
+its rows to a partition table named after the period (tracking_records_20261018 or
+tracking_records_2026w42) with its own R*Tree. Reads go through the tracking_records_all view,
+which joins the live table and every partition, and retention drops whole partitions. Record
+ids come from AUTOINCREMENT, so an id emptied by sealing is never reused and ids stay unique
+across the view (upgrade_record_ids() migrates older tables).
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+
+from shared.infrastructure.database import db
+
+SPATIAL_INDEX_TABLE = "tracking_records_rtree"
+
+# R*Tree coordinates are 32-bit floats; seconds counted from 2020-01-01 instead of 1970
+# keep the time axis precise to a few seconds
+TIME_ORIGIN = 1577836800
+
+_TIME_EXPR = f"CAST(strftime('%s', NEW.created_at) AS REAL) - {TIME_ORIGIN}"
+
+SPATIAL_INDEX_DDL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS "{SPATIAL_INDEX_TABLE}" '
+    'USING rtree(id, min_lat, max_lat, min_lon, max_lon, min_t, max_t)',
+
+    f'CREATE TRIGGER IF NOT EXISTS "{SPATIAL_INDEX_TABLE}_insert" AFTER INSERT ON "tracking_records" BEGIN '
+    f'INSERT INTO "{SPATIAL_INDEX_TABLE}" VALUES (NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude, '
+    f'{_TIME_EXPR}, {_TIME_EXPR}); END',
+
+    f'CREATE TRIGGER IF NOT EXISTS "{SPATIAL_INDEX_TABLE}_update" '
+    'AFTER UPDATE OF latitude, longitude, created_at ON "tracking_records" BEGIN '
+    f'UPDATE "{SPATIAL_INDEX_TABLE}" SET min_lat = NEW.latitude, max_lat = NEW.latitude, '
+    f'min_lon = NEW.longitude, max_lon = NEW.longitude, min_t = {_TIME_EXPR}, max_t = {_TIME_EXPR} '
+    'WHERE id = NEW.id; END',
+
+    f'CREATE TRIGGER IF NOT EXISTS "{SPATIAL_INDEX_TABLE}_delete" AFTER DELETE ON "tracking_records" BEGIN '
+    f'DELETE FROM "{SPATIAL_INDEX_TABLE}" WHERE id = OLD.id; END',
+)
+
+
+def create_spatial_index() -> None:
+    """Create the R*Tree and its triggers, indexing existing rows the first time."""
+    exists = db.table_exists(SPATIAL_INDEX_TABLE)
+    with db.atomic():
+        for statement in SPATIAL_INDEX_DDL:
+            db.execute_sql(statement)
+        if not exists:
+            time_expr = _TIME_EXPR.replace("NEW.", "")
+            db.execute_sql(
+                f'INSERT INTO "{SPATIAL_INDEX_TABLE}" '
+                f'SELECT id, latitude, latitude, longitude, longitude, {time_expr}, {time_expr} '
+                'FROM "tracking_records"'
+            )
+
+
+# Name peewee gives the model's (device_id, created_at) index, and the unique key over the
+# pings without a message id
+DEVICE_TIME_INDEX = "trackingrecord_device_id_created_at"
+DEVICE_TIME_KEY = "trackingrecord_device_id_created_at_key"
+
+DEDUP_DDL = (
+    # Duplicates left by earlier versions, keeping the first copy of each ping; pings with a
+    # message id are told apart by it, even when sent in the same second
+    'DELETE FROM "tracking_records" WHERE "message_id" IS NULL AND "id" NOT IN '
+    '(SELECT MIN("id") FROM "tracking_records" WHERE "message_id" IS NULL GROUP BY "device_id", "created_at")',
+
+    # Their pending deliveries would post the same ping again
+    'DELETE FROM "tracking_outbox" WHERE "status" = \'pending\' '
+    'AND "tracking_record_id" NOT IN (SELECT "id" FROM "tracking_records")',
+
+    'UPDATE "tracking_latest_positions" SET "tracking_record_id" = '
+    '(SELECT MIN(t."id") FROM "tracking_records" AS t WHERE t."device_id" = "tracking_latest_positions"."device_id" '
+    'AND t."created_at" = "tracking_latest_positions"."created_at") '
+    'WHERE "tracking_record_id" NOT IN (SELECT "id" FROM "tracking_records")',
+
+    # Earlier versions made this index unique over every ping; the model recreates it plain
+    f'DROP INDEX IF EXISTS "{DEVICE_TIME_INDEX}"',
+    f'CREATE UNIQUE INDEX "{DEVICE_TIME_KEY}" ON "tracking_records" ("device_id", "created_at") '
+    'WHERE "message_id" IS NULL',
+)
+
+
+def _has_index(table: str, name: str) -> bool:
+    return any(row[1] == name for row in db.execute_sql(f'PRAGMA index_list("{table}")'))
+
+
+def _upgrade_partition_keys() -> None:
+    """Give partitions sealed by earlier versions the same keys as new ones."""
+    for name in list_partitions():
+        if not _has_index(name, f"{name}_device_id_created_at_key"):
+            db.execute_sql(f'DROP INDEX IF EXISTS "{name}_device_id_created_at"')
+            for statement in _PARTITION_DDL[1:]:
+                db.execute_sql(statement.format(name=name))
+
+
+def upgrade_dedup_keys() -> None:
+    """
+    Bring a tracking_records table created before idempotent ingest up to date: add the
+    message_id column and key the pings without a message id by (device_id, created_at),
+    removing the duplicate rows first. Runs before the model's indexes are created; a no-op
+    on new databases.
+    """
+    if not db.table_exists("tracking_records"):
+        return
+
+    with db.atomic():
+        if "message_id" not in {column.name for column in db.get_columns("tracking_records")}:
+            db.execute_sql('ALTER TABLE "tracking_records" ADD COLUMN "message_id" VARCHAR(255)')
+
+        if not _has_index("tracking_records", DEVICE_TIME_KEY):
+            before = db.execute_sql('SELECT COUNT(*) FROM "tracking_records"').fetchone()[0]
+            for statement in DEDUP_DDL:
+                db.execute_sql(statement)
+            removed = before - db.execute_sql('SELECT COUNT(*) FROM "tracking_records"').fetchone()[0]
+            if removed:
+                logging.info(f"Removed {removed} duplicate tracking records")
+        _upgrade_partition_keys()
+
+
+_UPGRADE_TABLE = "tracking_records_upgrade"
+
+
+def upgrade_record_ids() -> None:
+    """
+    Rebuild a tracking_records table created without AUTOINCREMENT, so ids of sealed records are
+    never handed out again and stay unique across the read view. Live rows whose ids were already
+    reused are renumbered above the partitions, along with the outbox entries and latest positions
+    pointing at them. Runs before the model's table is created; a no-op on new databases.
+    """
+    if not db.table_exists(RECORDS_TABLE):
+        return
+    sql = db.execute_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (RECORDS_TABLE,)).fetchone()[0]
+    if "AUTOINCREMENT" in sql.upper():
+        return
+
+    from tracking.infrastructure.models import TrackingRecord
+
+    with db.atomic():
+        sealed_max = max([db.execute_sql(f'SELECT COALESCE(MAX("id"), 0) FROM "{name}"').fetchone()[0]
+                          for name in list_partitions()] or [0])
+        live_min = db.execute_sql(f'SELECT MIN("id") FROM "{RECORDS_TABLE}"').fetchone()[0]
+        offset = sealed_max if live_min is not None and live_min <= sealed_max else 0
+
+        # The view and the indexes would follow the renamed table, and index names are global
+        db.execute_sql(f'DROP VIEW IF EXISTS "{READ_VIEW}"')
+        db.execute_sql(f'ALTER TABLE "{RECORDS_TABLE}" RENAME TO "{_UPGRADE_TABLE}"')
+        for row in db.execute_sql(f'PRAGMA index_list("{_UPGRADE_TABLE}")').fetchall():
+            if row[3] == "c":
+                db.execute_sql(f'DROP INDEX "{row[1]}"')
+        TrackingRecord.create_table()
+        db.execute_sql(
+            f'INSERT INTO "{RECORDS_TABLE}" ({RECORD_TABLE_COLUMNS}) SELECT "id" + ?, '
+            f'{RECORD_TABLE_COLUMNS.split(", ", 1)[1]} FROM "{_UPGRADE_TABLE}"', (offset,)
+        )
+        if offset:
+            logging.info(f"Renumbered live tracking records by {offset} above the sealed ones")
+            for table in ("tracking_outbox", "tracking_latest_positions"):
+                db.execute_sql(
+                    f'UPDATE "{table}" SET "tracking_record_id" = "tracking_record_id" + ? WHERE EXISTS '
+                    f'(SELECT 1 FROM "{_UPGRADE_TABLE}" AS u WHERE u."id" = "{table}"."tracking_record_id" '
+                    f'AND u."device_id" = "{table}"."device_id")', (offset,)
+                )
+
+        # Dropping the old table drops its triggers; the R*Tree is rebuilt by create_spatial_index()
+        db.execute_sql(f'DROP TABLE "{_UPGRADE_TABLE}"')
+        db.execute_sql(f'DROP TABLE IF EXISTS "{SPATIAL_INDEX_TABLE}"')
+
+        high_water = max(sealed_max, db.execute_sql(f'SELECT COALESCE(MAX("id"), 0) FROM "{RECORDS_TABLE}"').fetchone()[0])
+        db.execute_sql("DELETE FROM sqlite_sequence WHERE name = ?", (RECORDS_TABLE,))
+        db.execute_sql("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (RECORDS_TABLE, high_water))
+
+
+def upgrade_outbox_trips() -> None:
+    """Add the trip_id and vehicle_id columns to an outbox created before they were stored at ingest."""
+    columns = {column.name for column in db.get_columns("tracking_outbox")}
+    for name in ("trip_id", "vehicle_id"):
+        if name not in columns:
+            db.execute_sql(f'ALTER TABLE "tracking_outbox" ADD COLUMN "{name}" INTEGER')
+
+
+def to_index_time(epoch_seconds: float) -> float:
+    """Convert a Unix timestamp to the R*Tree time axis."""
+    return epoch_seconds - TIME_ORIGIN
+
+
+RECORDS_TABLE = "tracking_records"
+READ_VIEW = "tracking_records_all"
+PARTITION_PERIODS = ("day", "week")
+
+_PARTITION_PATTERN = re.compile(r"^tracking_records_(\d{8}|\d{4}w\d{2})$")
+RECORD_TABLE_COLUMNS = '"id", "device_id", "latitude", "longitude", "speed", "created_at", "message_id"'
+_PARTITION_DDL = (
+    'CREATE TABLE IF NOT EXISTS "{name}" ("id" INTEGER NOT NULL PRIMARY KEY, "device_id" VARCHAR(255) NOT NULL, '
+    '"latitude" REAL NOT NULL, "longitude" REAL NOT NULL, "speed" REAL NOT NULL, "created_at" DATETIME NOT NULL, '
+    '"message_id" VARCHAR(255))',
+    'CREATE INDEX IF NOT EXISTS "{name}_device_id_created_at" ON "{name}" ("device_id", "created_at")',
+    'CREATE UNIQUE INDEX IF NOT EXISTS "{name}_device_id_created_at_key" ON "{name}" ("device_id", "created_at") '
+    'WHERE "message_id" IS NULL',
+    'CREATE UNIQUE INDEX IF NOT EXISTS "{name}_device_id_message_id" ON "{name}" ("device_id", "message_id") '
+    'WHERE "message_id" IS NOT NULL',
+    'CREATE VIRTUAL TABLE IF NOT EXISTS "{name}_rtree" USING rtree(id, min_lat, max_lat, min_lon, max_lon, min_t, max_t)',
+)
+
+
+def period_start(moment: datetime, period: str) -> datetime:
+    """Start (UTC midnight, Mondays for weeks) of the partition period holding moment."""
+    start = moment.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "week":
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def partition_name(moment: datetime, period: str) -> str:
+    """Name of the partition table holding records created at moment."""
+    moment = moment.astimezone(timezone.utc)
+    if period == "week":
+        year, week, _ = moment.isocalendar()
+        return f"{RECORDS_TABLE}_{year}w{week:02d}"
+    return f"{RECORDS_TABLE}_{moment:%Y%m%d}"
+
+
+def partition_bounds(name: str) -> tuple[datetime, datetime]:
+    """[start, end) of the records held by a partition, from its name."""
+    suffix = _PARTITION_PATTERN.match(name).group(1)
+    if "w" in suffix:
+        start = datetime.fromisocalendar(int(suffix[:4]), int(suffix[5:]), 1).replace(tzinfo=timezone.utc)
+        return start, start + timedelta(weeks=1)
+    start = datetime.strptime(suffix, "%Y%m%d").replace(tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def spatial_index_of(table: str) -> str:
+    """R*Tree indexing a records table (the live table or a partition)."""
+    return SPATIAL_INDEX_TABLE if table == RECORDS_TABLE else f"{table}_rtree"
+
+
+def list_partitions() -> list[str]:
+    """Partition tables, oldest first."""
+    names = [row[0] for row in db.execute_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB 'tracking_records_*'"
+    ) if _PARTITION_PATTERN.match(row[0])]
+    return sorted(names, key=partition_bounds)
+
+
+def record_tables() -> list[str]:
+    """Every table holding tracking records: the live table, then the partitions oldest first."""
+    return [RECORDS_TABLE] + list_partitions()
+
+
+def create_read_view(partitions: list[str] = None) -> None:
+    """(Re)create the view reading the live table and the partitions; run after adding or dropping one."""
+    tables = [RECORDS_TABLE] + (list_partitions() if partitions is None else partitions)
+    select = " UNION ALL ".join(f'SELECT {RECORD_TABLE_COLUMNS} FROM "{table}"' for table in tables)
+    with db.atomic():
+        db.execute_sql(f'DROP VIEW IF EXISTS "{READ_VIEW}"')
+        db.execute_sql(f'CREATE VIEW "{READ_VIEW}" AS {select}')
+
+
+def create_partition(name: str) -> None:
+    """Create a partition table, its indexes and its R*Tree, and add it to the read view."""
+    with db.atomic():
+        for statement in _PARTITION_DDL:
+            db.execute_sql(statement.format(name=name))
+        create_read_view()
+
+
+def drop_partition(name: str) -> None:
+    """Drop a partition and its R*Tree; the freed pages go to the freelist for incremental vacuum."""
+    with db.atomic():
+        partitions = [partition for partition in list_partitions() if partition != name]
+        create_read_view(partitions)
+        db.execute_sql(f'DROP TABLE IF EXISTS "{spatial_index_of(name)}"')
+        db.execute_sql(f'DROP TABLE IF EXISTS "{name}"')
+
+
+def copy_to_spatial_index(table: str, record_ids: list[int]) -> None:
+    """Index the given rows of a partition in its R*Tree."""
+    time_expr = _TIME_EXPR.replace("NEW.", "")
+    placeholders = ", ".join("?" * len(record_ids))
+    db.execute_sql(
+        f'INSERT INTO "{spatial_index_of(table)}" '
+        f'SELECT id, latitude, latitude, longitude, longitude, {time_expr}, {time_expr} '
+        f'FROM "{table}" WHERE id IN ({placeholders})',
+        record_ids
+    )
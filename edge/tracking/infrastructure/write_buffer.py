@@ -0,0 +1,162 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Any, Sequence
+
+from tracking.domain.entities import TrackingRecord
+
+
+class TrackingWriteBuffer:
+    """
+    Write-behind queue for tracking records.
+
+    Records are queued in memory and a background writer persists them in group commits,
+    flushing when batch_size records are waiting or flush_interval seconds have passed.
+    The queue is bounded: when it is full, put() waits up to put_timeout seconds and then
+    rejects the record so callers feel the backpressure instead of growing memory.
+    put() checks for shutdown and enqueues under the lock close() takes to stop the writer,
+    so every record put() accepts is still written by the final flush.
+
+    Queued records have no id until their group commit lands; the writer then fills in
+    record.id on the same objects that were queued.
+
+    flush receives the batch of records plus, per record, whether it must be forwarded
+    to the backend, and returns the stored records in the same order, with None for
+    records rejected as duplicates; those never get an id.
+    """
+
+    def __init__(self, flush: Callable[[list[TrackingRecord], Sequence[bool]], list[TrackingRecord]],
+                 max_queue_size: int = 10000,
+                 batch_size: int = 500, flush_interval: float = 0.5, put_timeout: float = 2.0):
+        self.flush = flush
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        # Held by put() from its shutdown check until the record is queued, and by close()
+        # while it stops accepting records
+        self._accepting = threading.Lock()
+        self._thread = None
+
+        self.written = 0
+        self.flushes = 0
+        self.rejected = 0
+        self.failed_flushes = 0
+        self.duplicates = 0
+
+    def start(self) -> None:
+        """Start the background writer; called lazily on the first put."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="tracking-write-behind", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def put(self, record: TrackingRecord, forward: bool = False) -> TrackingRecord:
+        """Queue a record for the next group commit."""
+        deadline = time.monotonic() + self.put_timeout
+        while True:
+            # The lock is not held while waiting for room, so close() never waits on a full queue
+            with self._accepting:
+                if self._stopping.is_set():
+                    raise ValueError("Write buffer is shutting down")
+                if self._thread is None:
+                    self.start()
+                try:
+                    self._queue.put_nowait((record, forward))
+                    return record
+                except queue.Full:
+                    pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.rejected += 1
+                raise ValueError("Tracking write buffer is full, retry later")
+            time.sleep(min(remaining, 0.01))
+
+    def depth(self) -> int:
+        """Number of records waiting to be written."""
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth(),
+            "capacity": self.max_queue_size,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "rejected": self.rejected,
+            "duplicates": self.duplicates
+        }
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Stop accepting records and flush everything still queued."""
+        with self._accepting:
+            self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+            # No record can be queued once stopping is set, so an empty queue is final
+            elif self._stopping.is_set() and self._queue.empty():
+                return
+
+    def _next_batch(self) -> list[tuple[TrackingRecord, bool]]:
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0 and not self._stopping.is_set():
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list[tuple[TrackingRecord, bool]]) -> None:
+        records = [record for record, _ in batch]
+        forward = [flag for _, flag in batch]
+        delay = 0.1
+        attempts = 0
+        while True:
+            try:
+                saved = self.flush(records, forward)
+                break
+            except Exception as e:
+                attempts += 1
+                self.failed_flushes += 1
+                if self._stopping.is_set() and attempts >= 3:
+                    logging.error(f"Dropping {len(batch)} tracking records after failed final flush: {e}")
+                    return
+                logging.error(f"Tracking group commit failed, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+        written = 0
+        for record, stored in zip(records, saved):
+            if stored is not None:
+                record.id = stored.id
+                written += 1
+        self.written += written
+        self.duplicates += len(batch) - written
+        self.flushes += 1
@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional
+
+from tracking.domain.entities import TrackingRecord
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+EXPORT_FIELDS = ("id", "device_id", "latitude", "longitude", "speed", "created_at")
+
+
+def format_timestamp(moment: Optional[datetime]) -> Optional[str]:
+    """ISO 8601 in UTC with a Z suffix; naive datetimes are taken as UTC."""
+    if moment is None:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.isoformat() + "Z"
+
+
+def export_row(record: TrackingRecord) -> tuple:
+    """One record as a row of EXPORT_FIELDS."""
+    return (
+        record.id,
+        record.device_id,
+        record.latitude,
+        record.longitude,
+        record.speed,
+        format_timestamp(record.created_at)
+    )
+
+
+def export_chunks(records: Iterable[TrackingRecord], fmt: str, rows_per_chunk: int = 500) -> Iterator[str]:
+    """
+    Serialize records as NDJSON or CSV, yielding one string per rows_per_chunk rows so
+    a streamed response never holds more than one chunk in memory.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n") if fmt == "csv" else None
+    if writer:
+        writer.writerow(EXPORT_FIELDS)
+
+    rows = 0
+    for record in records:
+        row = export_row(record)
+        if writer:
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, row))))
+            buffer.write("\n")
+        rows += 1
+        if rows % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining
@@ -0,0 +1,119 @@
+import json
+from typing import Any
+
+JSON_TYPES = ("application/json",)
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+CBOR_TYPES = ("application/cbor",)
+LINE_PROTOCOL_TYPES = ("text/plain", "application/x-tracking-lines")
+
+# Field order of the positional forms (line protocol lines and MessagePack/CBOR arrays):
+# rfid_code, latitude, longitude, speed, optionally created_at as Unix epoch seconds and
+# optionally the client message id used for idempotent ingest
+
+
+class UnsupportedMediaTypeError(ValueError):
+    """Raised for a Content-Type the endpoint cannot decode; answered with 415."""
+
+
+def is_json_type(mimetype: str) -> bool:
+    """JSON, including structured +json types such as application/vnd.edge+json, as Request.is_json."""
+    return mimetype in JSON_TYPES or (mimetype.startswith("application/") and mimetype.endswith("+json"))
+
+
+def _as_epoch(value: Any) -> Any:
+    """Positional pings carry created_at as Unix epoch seconds; ISO strings are kept as they are."""
+    if isinstance(value, str):
+        try:
+            return float(value) if value.strip() else None
+        except ValueError:
+            return value
+    return value
+
+
+def normalize_ping(item: Any) -> Any:
+    """Turn a positional ping ([rfid, lat, lon, speed, epoch, message_id]) into the keyed form; maps pass through."""
+    if not isinstance(item, (list, tuple)):
+        return item
+    if len(item) == 6:
+        return {"rfid_code": item[0], "latitude": item[1], "longitude": item[2], "speed": item[3],
+                "created_at": _as_epoch(item[4]), "message_id": item[5] if item[5] != "" else None}
+    if len(item) == 5:
+        return {"rfid_code": item[0], "latitude": item[1], "longitude": item[2], "speed": item[3],
+                "created_at": _as_epoch(item[4])}
+    if len(item) == 4:
+        return {"rfid_code": item[0], "latitude": item[1], "longitude": item[2], "speed": item[3]}
+    return {}
+
+
+def parse_line_protocol(text: str) -> list[dict]:
+    """
+    One ping per line as rfid,lat,lon,speed,epoch,message_id (epoch and message_id optional,
+    an empty epoch field keeps the server time). Blank lines and lines
+    starting with # are skipped; a malformed line becomes an empty ping, so it is reported
+    as missing fields at its index.
+    """
+    pings = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = line.split(",")
+        # float() ignores surrounding whitespace, so only the RFID code and message id need stripping
+        fields[0] = fields[0].strip()
+        if len(fields) == 6:
+            fields[5] = fields[5].strip()
+        pings.append(normalize_ping(fields))
+    return pings
+
+
+def _decode_msgpack(body: bytes) -> Any:
+    try:
+        import msgpack
+    except ImportError:
+        raise UnsupportedMediaTypeError("MessagePack bodies require the msgpack package")
+    try:
+        return msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise ValueError(f"Malformed MessagePack body: {e}")
+
+
+def _decode_cbor(body: bytes) -> Any:
+    try:
+        import cbor2
+    except ImportError:
+        raise UnsupportedMediaTypeError("CBOR bodies require the cbor2 package")
+    try:
+        return cbor2.loads(body)
+    except Exception as e:
+        raise ValueError(f"Malformed CBOR body: {e}")
+
+
+def decode_ingest_body(mimetype: str, body: bytes, allow_line_protocol: bool = False) -> Any:
+    """
+    Decode a tracking ingest body by its Content-Type (JSON when none is given); parameters
+    such as charset are ignored. Positional pings are returned in the keyed form, so every
+    format reaches the same validation.
+    """
+    mimetype = (mimetype or "application/json").split(";")[0].strip().lower()
+    if is_json_type(mimetype):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise ValueError("Malformed JSON body")
+    elif mimetype in MSGPACK_TYPES:
+        data = _decode_msgpack(body)
+    elif mimetype in CBOR_TYPES:
+        data = _decode_cbor(body)
+    elif mimetype in LINE_PROTOCOL_TYPES and allow_line_protocol:
+        try:
+            return parse_line_protocol(body.decode("utf-8"))
+        except UnicodeDecodeError:
+            raise ValueError("Line protocol bodies must be UTF-8 text")
+    else:
+        raise UnsupportedMediaTypeError(f"Unsupported Content-Type: {mimetype}")
+
+    if isinstance(data, dict) and isinstance(data.get("records"), list):
+        data = data["records"]
+    if isinstance(data, list) and data and isinstance(data[0], (list, tuple, dict)):
+        return [normalize_ping(item) for item in data]
+    return normalize_ping(data)
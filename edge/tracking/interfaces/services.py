@@ -1,29 +1,80 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from tracking.application.services import TrackingRecordApplicationService
+from tracking.domain.services import DuplicateRecordError, parse_flag
+from tracking.interfaces.export import EXPORT_FORMATS, export_chunks, format_timestamp
+from tracking.interfaces.ingest import UnsupportedMediaTypeError, decode_ingest_body
+from tracking.infrastructure.pubsub import SubscriberLimitError
+from shared.infrastructure.database import init_db
+import click
+import json
 import os
 
-tracking_api = Blueprint("tracking_api", __name__)
+tracking_api = Blueprint("tracking_api", __name__, cli_group="tracking")
 
 # Initialize with backend URL from environment variable
 backend_url = os.getenv('BACKEND_URL', 'http://localhost:8080')
 jwt_token = os.getenv('JWT_TOKEN')
 tracking_service = TrackingRecordApplicationService(backend_url, jwt_token)
 
+# Upper bound on pings accepted by a single batch request
+batch_max_size = int(os.getenv('TRACKING_BATCH_MAX_SIZE', '5000'))
+
+# Page size of GET /api/v1/tracking, overridable per request up to the maximum
+page_size = int(os.getenv('TRACKING_PAGE_SIZE', '100'))
+page_max_size = int(os.getenv('TRACKING_PAGE_MAX_SIZE', '1000'))
+
+# Seconds between keep-alive comments on an idle live stream
+stream_keepalive = float(os.getenv('TRACKING_STREAM_KEEPALIVE', '15'))
+
+# Rows read per query while streaming an export
+export_chunk_size = int(os.getenv('TRACKING_EXPORT_CHUNK_SIZE', '1000'))
+
+def serialize_record(record) -> dict:
+    return {
+        "id": record.id,
+        "device_id": record.device_id,
+        "latitude": record.latitude,
+        "longitude": record.longitude,
+        "speed": record.speed,
+        "created_at": format_timestamp(record.created_at)
+    }
+
+def read_ingest_body(allow_line_protocol: bool = False):
+    """Decoded request body; raises UnsupportedMediaTypeError or ValueError."""
+    return decode_ingest_body(request.mimetype, request.get_data(cache=False), allow_line_protocol)
+
 @tracking_api.route("/api/v1/tracking", methods=["POST"])
 def create_tracking():
     """
     Create a new tracking record with authentication.
-    Expected JSON: { "rfid_code": "...", "api_key": "...", "latitude": ..., "longitude": ..., "created_at": optional }
+    Expected JSON: { "rfid_code": "...", "api_key": "...", "latitude": ..., "longitude": ..., "created_at": optional,
+    "message_id": optional }
+    Ingest is idempotent: a ping with the same message_id, or without one the same created_at, as an
+    already stored ping of the device is answered 200 {"status": "duplicate"} and not stored again.
+    In write-behind mode the record is queued for a group commit: responds 202 with "id": null,
+    the id is only assigned once the commit lands. With trajectory simplification enabled, a ping
+    inside the device's dead-band is not stored and the response is 200 {"status": "suppressed"}.
+    The body may also be MessagePack (application/msgpack) or CBOR (application/cbor), as the same
+    map or as an array [rfid_code, latitude, longitude, speed, epoch seconds, message_id (optional)].
     """
     
-    data = request.json
+    try:
+        data = read_ingest_body()
+    except UnsupportedMediaTypeError as e:
+        return jsonify({"error": str(e)}), 415
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not isinstance(data, dict):
+        return jsonify({"error": "A tracking record object is required"}), 400
+
     try:
         rfid_code = data["rfid_code"]
         latitude = data["latitude"]
         longitude = data["longitude"]
         speed = data["speed"]
         created_at = data.get("created_at")
-        use_backend = data.get("use_backend", True)
+        message_id = data.get("message_id")
+        use_backend = parse_flag(data.get("use_backend", True), "use_backend")
 
         if use_backend:
             # Guardar local Y enviar al backend
@@ -33,7 +84,8 @@ def create_tracking():
                 latitude=latitude,
                 longitude=longitude,
                 speed=speed,
-                created_at=created_at
+                created_at=created_at,
+                message_id=message_id
             )
         else:
             # Solo guardar local
@@ -42,34 +94,372 @@ def create_tracking():
                 api_key=request.headers.get("X-API-Key"),
                 latitude=latitude,
                 longitude=longitude,
-                created_at=created_at
+                speed=speed,
+                created_at=created_at,
+                message_id=message_id
             )
 
-        return jsonify({
-            "id": record.id,
-            "device_id": record.device_id,
-            "latitude": record.latitude,
-            "longitude": record.longitude,
-            "speed": record.speed,
-            "created_at": record.created_at.isoformat() + "Z"
-        }), 201
+        if record is None:
+            return jsonify({"status": "suppressed"}), 200
+        if record.id is None:
+            return jsonify({"status": "queued", **serialize_record(record)}), 202
+        return jsonify(serialize_record(record)), 201
 
+    except DuplicateRecordError:
+        return jsonify({"status": "duplicate"}), 200
     except KeyError:
         return jsonify({"error": "Missing required fields"}), 400
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
 
+@tracking_api.route("/api/v1/tracking/batch", methods=["POST"])
+def create_tracking_batch():
+    """
+    Create many tracking records in one request, e.g. when a reader flushes its offline buffer.
+    Expected JSON: [ { "rfid_code": "...", "latitude": ..., "longitude": ..., "speed": ..., "created_at": optional,
+    "message_id": optional }, ... ]
+    or { "records": [ ... ] }. Records are stored in a single transaction; pings with use_backend
+    (a boolean or "true"/"false", default true, or the use_backend query parameter) are queued for the backend forwarder in that
+    same transaction.
+    Compact bodies are negotiated by Content-Type: MessagePack (application/msgpack) or CBOR
+    (application/cbor) arrays of maps or of [rfid_code, latitude, longitude, speed, epoch] arrays,
+    and the text/plain line protocol with one "rfid_code,latitude,longitude,speed,epoch" per line;
+    both positional forms take the message_id as an optional sixth field.
+    Pings already stored, or repeated within the batch, are reported as "duplicate".
+    Responds 201 when every ping was accepted (stored, simplified away or duplicate), 207 when only
+    some were, 400 when none were.
+    """
+
+    try:
+        pings = read_ingest_body(allow_line_protocol=True)
+    except UnsupportedMediaTypeError as e:
+        return jsonify({"error": str(e)}), 415
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not isinstance(pings, list) or not pings:
+        return jsonify({"error": "A non-empty array of records is required"}), 400
+    if len(pings) > batch_max_size:
+        return jsonify({"error": f"Batch exceeds the maximum of {batch_max_size} records"}), 413
+
+    try:
+        use_backend = parse_flag(request.args.get("use_backend", "true"), "use_backend")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    for ping in pings:
+        if isinstance(ping, dict):
+            ping.setdefault("use_backend", use_backend)
+
+    results = tracking_service.create_tracking_records_batch(request.headers.get("X-API-Key"), pings)
+
+    items = []
+    created = 0
+    suppressed = 0
+    duplicates = 0
+    for index, result in enumerate(results):
+        if "record" in result:
+            created += 1
+            items.append({"index": index, "status": "created", **serialize_record(result["record"])})
+        elif "suppressed" in result:
+            suppressed += 1
+            items.append({"index": index, "status": "suppressed"})
+        elif "duplicate" in result:
+            duplicates += 1
+            items.append({"index": index, "status": "duplicate"})
+        else:
+            items.append({"index": index, "status": "error", "error": result["error"]})
+
+    accepted = created + suppressed + duplicates
+    status = 201 if accepted == len(results) else 207 if accepted else 400
+    return jsonify({
+        "created": created,
+        "suppressed": suppressed,
+        "duplicates": duplicates,
+        "failed": len(results) - accepted,
+        "results": items
+    }), status
+
+@tracking_api.route("/api/v1/tracking/buffer", methods=["GET"])
+def get_write_buffer_stats():
+    """Report queue depth and flush counters of the write-behind buffer."""
+    return jsonify(tracking_service.get_write_buffer_stats())
+
+@tracking_api.route("/api/v1/tracking/outbox", methods=["GET"])
+def get_outbox_stats():
+    """Report outbox entry counts by delivery status."""
+    return jsonify(tracking_service.get_outbox_stats())
+
+@tracking_api.route("/api/v1/tracking/backend", methods=["GET"])
+def get_backend_stats():
+    """Report the circuit breaker state of the backend connection."""
+    return jsonify(tracking_service.get_backend_stats())
+
+@tracking_api.route("/api/v1/tracking/storage", methods=["GET"])
+def get_storage_stats():
+    """Report the live table and partitions, database file usage and the last maintenance run."""
+    return jsonify(tracking_service.get_storage_stats())
+
+@tracking_api.route("/api/v1/tracking/rollups", methods=["GET"])
+def get_rollups():
+    """
+    Get the minute or day summaries of a device; they outlive the raw records.
+    Required query param: device_id. Optional: resolution (minute|day), since, until, limit.
+    """
+    device_id = request.args.get("device_id")
+    if not device_id:
+        return jsonify({"error": "device_id is required"}), 400
+    limit = request.args.get("limit", page_size, type=int)
+    if not 1 <= limit <= page_max_size:
+        return jsonify({"error": f"limit must be between 1 and {page_max_size}"}), 400
+
+    resolution = request.args.get("resolution", "minute")
+    try:
+        summaries = tracking_service.get_rollups(
+            device_id, resolution, since=request.args.get("since"), until=request.args.get("until"), limit=limit
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if resolution == "day":
+        return jsonify([
+            {
+                'device_id': summary.device_id,
+                'day': summary.day.isoformat(),
+                'points': summary.points,
+                'distance_m': round(summary.distance_meters, 2),
+                'max_speed': summary.max_speed,
+                'first_at': summary.first_at.isoformat(),
+                'last_at': summary.last_at.isoformat()
+            }
+            for summary in summaries
+        ])
+    return jsonify([
+        {
+            'device_id': summary.device_id,
+            'minute': summary.minute.isoformat(),
+            'points': summary.points,
+            'latitude': summary.latitude,
+            'longitude': summary.longitude,
+            'average_speed': summary.average_speed,
+            'max_speed': summary.max_speed
+        }
+        for summary in summaries
+    ])
+
+@tracking_api.route("/api/v1/tracking/trip-cache", methods=["DELETE"])
+def invalidate_trip_cache():
+    """
+    Invalidate cached RFID -> trip lookups.
+    Optional query params: rfid_code, student_id, driver_id, trip_id. Without any, the whole cache is cleared.
+    """
+    tracking_service.invalidate_trip_cache(
+        rfid_code=request.args.get("rfid_code"),
+        student_id=request.args.get("student_id", type=int),
+        driver_id=request.args.get("driver_id", type=int),
+        trip_id=request.args.get("trip_id", type=int)
+    )
+    return "", 204
+
 @tracking_api.route('/api/v1/tracking', methods=['GET'])
 def get_locations():
-    """Get all tracking records (admin endpoint)."""
-    locations = tracking_service.get_all_locations()
-    return jsonify([
+    """
+    Get tracking records one page at a time (admin endpoint).
+    Optional query params: device_id, since and until (ISO 8601, until exclusive), limit, cursor.
+    When more records exist, the X-Next-Cursor response header holds the cursor of the next page.
+    """
+    limit = request.args.get("limit", page_size, type=int)
+    if not 1 <= limit <= page_max_size:
+        return jsonify({"error": f"limit must be between 1 and {page_max_size}"}), 400
+
+    try:
+        locations, next_cursor = tracking_service.get_locations_page(
+            limit,
+            cursor=request.args.get("cursor"),
+            device_id=request.args.get("device_id"),
+            since=request.args.get("since"),
+            until=request.args.get("until")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = jsonify([
         {
             'id': loc.id,
             'device_id': loc.device_id,
             'latitude': loc.latitude,
             'longitude': loc.longitude,
-            'created_at': loc.created_at.isoformat() + "Z" if loc.created_at else None
+            'created_at': format_timestamp(loc.created_at)
         }
         for loc in locations
-    ])
\ No newline at end of file
+    ])
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+@tracking_api.route("/api/v1/tracking/latest", methods=["GET"])
+def get_latest_locations():
+    """
+    Get the last known position of every device.
+    Optional query param: device_id, repeated or comma-separated, to restrict the devices.
+    """
+    device_ids = [device_id for value in request.args.getlist("device_id") for device_id in value.split(",") if device_id]
+    locations = tracking_service.get_latest_locations(device_ids or None)
+    return jsonify([serialize_record(loc) for loc in sorted(locations, key=lambda loc: loc.device_id)])
+
+def format_event(record) -> str:
+    """One Server-Sent Event carrying a tracking record."""
+    return f"id: {record.id}\nevent: location\ndata: {json.dumps(serialize_record(record))}\n\n"
+
+@tracking_api.route("/api/v1/tracking/stream", methods=["GET"])
+def stream_locations():
+    """
+    Stream tracking records as Server-Sent Events (event "location") as soon as they are stored.
+    Optional query params: device_id, repeated or comma-separated, to restrict the devices;
+    snapshot=true to start with each device's last known position.
+    A client that falls behind loses its oldest undelivered records rather than slowing ingest.
+    """
+    device_ids = [device_id for value in request.args.getlist("device_id") for device_id in value.split(",") if device_id]
+    try:
+        subscription = tracking_service.subscribe_locations(device_ids or None)
+    except SubscriberLimitError as e:
+        return jsonify({"error": str(e)}), 503
+    # Read before streaming starts, while the request context is still available
+    snapshot = request.args.get("snapshot", "false").lower() == "true"
+
+    def events():
+        try:
+            # Tells EventSource how long to wait before reconnecting
+            yield "retry: 3000\n\n"
+            if snapshot:
+                for record in sorted(tracking_service.get_latest_locations(device_ids or None),
+                                     key=lambda record: record.device_id):
+                    yield format_event(record)
+            while True:
+                records = subscription.get(stream_keepalive)
+                if subscription.closed:
+                    return
+                if not records:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield "".join(format_event(record) for record in records)
+        finally:
+            subscription.close()
+
+    response = Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # Also covers a response closed before the generator ever started
+    response.call_on_close(subscription.close)
+    return response
+
+@tracking_api.route("/api/v1/tracking/area", methods=["GET"])
+def get_locations_in_area():
+    """
+    Get tracking records inside a bounding box.
+    Required query params: min_lat, max_lat, min_lon, max_lon. Optional: since, until, limit,
+    devices_only=true to return only the distinct device ids seen in the area.
+    """
+    limit = request.args.get("limit", page_size, type=int)
+    if not 1 <= limit <= page_max_size:
+        return jsonify({"error": f"limit must be between 1 and {page_max_size}"}), 400
+
+    area = (request.args.get("min_lat"), request.args.get("max_lat"), request.args.get("min_lon"), request.args.get("max_lon"))
+    try:
+        if request.args.get("devices_only", "false").lower() == "true":
+            return jsonify(tracking_service.find_devices_in_area(
+                *area, since=request.args.get("since"), until=request.args.get("until")
+            ))
+        locations = tracking_service.find_locations_in_area(
+            *area, since=request.args.get("since"), until=request.args.get("until"), limit=limit
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify([serialize_record(loc) for loc in locations])
+
+@tracking_api.route("/api/v1/tracking/nearby", methods=["GET"])
+def get_locations_nearby():
+    """
+    Get tracking records within a radius of a point.
+    Required query params: lat, lon, radius (metres). Optional: since, until, limit.
+    """
+    limit = request.args.get("limit", page_size, type=int)
+    if not 1 <= limit <= page_max_size:
+        return jsonify({"error": f"limit must be between 1 and {page_max_size}"}), 400
+
+    try:
+        matches = tracking_service.find_locations_near(
+            request.args.get("lat"),
+            request.args.get("lon"),
+            request.args.get("radius"),
+            since=request.args.get("since"),
+            until=request.args.get("until"),
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify([{**serialize_record(loc), "distance_m": round(distance, 2)} for loc, distance in matches])
+
+@tracking_api.route("/api/v1/tracking/export", methods=["GET"])
+def export_locations():
+    """
+    Stream tracking records as NDJSON (default) or CSV.
+    Optional query params: format (ndjson|csv), device_id, since, until, after_id.
+    Rows come in the same order as the paginated endpoint; pass the last id received as
+    after_id to resume an interrupted export.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    try:
+        records = tracking_service.export_locations(
+            export_chunk_size,
+            device_id=request.args.get("device_id"),
+            since=request.args.get("since"),
+            until=request.args.get("until"),
+            after_id=request.args.get("after_id", type=int)
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return Response(
+        stream_with_context(export_chunks(records, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename=tracking.{fmt}"}
+    )
+
+@tracking_api.cli.command("export")
+@click.option("--format", "fmt", type=click.Choice(list(EXPORT_FORMATS)), default="ndjson")
+@click.option("--device-id", default=None, help="Only export this device.")
+@click.option("--since", default=None, help="ISO 8601 lower bound (inclusive).")
+@click.option("--until", default=None, help="ISO 8601 upper bound (exclusive).")
+@click.option("--after-id", type=int, default=None, help="Resume after this record id.")
+@click.option("--output", type=click.File("w"), default="-", help="Output file, stdout by default.")
+def export_command(fmt, device_id, since, until, after_id, output):
+    """Stream tracking records as NDJSON or CSV."""
+    try:
+        records = tracking_service.export_locations(export_chunk_size, device_id, since, until, after_id)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    for chunk in export_chunks(records, fmt):
+        output.write(chunk)
+
+@tracking_api.cli.command("replay-outbox")
+@click.option("--status", type=click.Choice(["no_trip", "failed"]), default="no_trip",
+              help="Parked entries to replay: no active trip at delivery (default) or out of attempts.")
+def replay_outbox_command(status):
+    """Queue parked outbox entries for delivery again; those without a stored trip resolve it anew."""
+    init_db()
+    click.echo(f"Requeued {tracking_service.replay_outbox(status)} outbox entries")
+
+@tracking_api.cli.command("maintain")
+@click.option("--full-vacuum", is_flag=True, help="Rebuild the database file with VACUUM (blocks writers).")
+def maintain_command(full_vacuum):
+    """Seal ended periods into partitions, apply retention and vacuum once."""
+    init_db()
+    result = tracking_service.run_maintenance(full_vacuum)
+    click.echo(json.dumps(result, indent=2))
@@ -0,0 +1,8 @@
+"""
+WSGI entry point for production servers, e.g. gunicorn wsgi:app. Unlike an import of app,
+it starts the outbox forwarder and the storage maintenance.
+"""
+
+from app import app, run_workers
+
+run_workers()